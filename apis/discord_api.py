@@ -0,0 +1,106 @@
+import json
+import os
+
+import requests
+
+from apis.rate_limit import RETRYABLE_STATUSES, limiter
+from apis.registry import ROOT_DIR
+
+
+class DiscordRestClient:
+    """Sends Discord DMs over the REST API, without a gateway connection.
+
+    Uses one pooled HTTP session, and caches each user's DM channel id (in memory
+    and in a small JSON file) so a scheduled message costs a single POST.
+    """
+
+    API_BASE = "https://discord.com/api/v10"
+    MESSAGE_LIMIT = 2000
+
+    def __init__(self, token: str = None, cache_path: str = None, timeout: float = 10):
+        self.token = token or os.getenv("DISCORD_BOT_TOKEN")
+        self.cache_path = cache_path or os.getenv(
+            "DISCORD_DM_CACHE_PATH", str(ROOT_DIR / "discord_dm_channels.json")
+        )
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bot {self.token}",
+                "User-Agent": "DiscordBot (https://github.com/lancezhang04/dailyAggregator, 1.0)",
+            }
+        )
+        self._dm_channels = self._load_cache()
+
+    def send_dm(self, user_id: str | int, content: str) -> list[dict]:
+        """Sends content to a user's DMs, split into Discord-sized messages."""
+        user_id = str(user_id)
+        chunks = [
+            content[i : i + self.MESSAGE_LIMIT]
+            for i in range(0, len(content), self.MESSAGE_LIMIT)
+        ] or [""]
+
+        try:
+            return self._send_chunks(self.open_dm_channel(user_id), chunks)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            # The cached DM channel is gone; open a fresh one and try again
+            self._dm_channels.pop(user_id, None)
+            return self._send_chunks(self.open_dm_channel(user_id), chunks)
+
+    def open_dm_channel(self, user_id: str) -> str:
+        channel_id = self._dm_channels.get(user_id)
+        if channel_id is None:
+            channel = self._request(
+                "POST", "/users/@me/channels", json={"recipient_id": user_id}
+            )
+            channel_id = self._dm_channels[user_id] = channel["id"]
+            self._save_cache()
+        return channel_id
+
+    def _send_chunks(self, channel_id: str, chunks: list[str]) -> list[dict]:
+        return [
+            self._request(
+                "POST",
+                f"/channels/{channel_id}/messages",
+                json={"content": c},
+                idempotent=False,
+            )
+            for c in chunks
+        ]
+
+    def _request(
+        self, method: str, path: str, idempotent: bool = True, **kwargs
+    ) -> dict:
+        def send():
+            response = self.session.request(
+                method, self.API_BASE + path, timeout=self.timeout, **kwargs
+            )
+            # Raise on throttling/server errors so the limiter retries them
+            if response.status_code in RETRYABLE_STATUSES:
+                response.raise_for_status()
+            return response
+
+        # Re-posting a message after a 5xx/timeout could send it twice
+        call = limiter("discord").call if idempotent else limiter("discord").call_write
+        response = call(send)
+        response.raise_for_status()
+        return response.json()
+
+    def _load_cache(self) -> dict:
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading Discord DM channel cache: {e}")
+            return {}
+
+    def _save_cache(self):
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(self._dm_channels, f)
+        except OSError as e:
+            print(f"Error saving Discord DM channel cache: {e}")
@@ -1,5 +1,6 @@
 import os.path
 import base64
+import threading
 from email.message import EmailMessage
 
 from google.auth.transport.requests import Request
@@ -9,10 +10,16 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from google.auth.exceptions import RefreshError
 
+from apis.gmail_outbox import EmailOutbox
+from apis.rate_limit import limiter
+from apis.registry import ROOT_DIR
+
 
 class GmailClient:
     # If modifying these scopes, delete the file token.json.
     SCOPES = ["https://www.googleapis.com/auth/gmail.send"]
+    # Gmail accepts up to 100 calls per batch but recommends staying at or below 50
+    BATCH_SIZE = 50
 
     def __init__(
         self,
@@ -22,6 +29,25 @@ class GmailClient:
         self.credentials_path = credentials_path
         self.token_path = token_path
         self.creds = self._authenticate()
+        self._service = None
+        self._outbox = None
+        # httplib2 connections are not thread-safe, so serialize use of the service
+        self._lock = threading.Lock()
+        # Separate from _lock, so queueing never waits behind a send in flight
+        self._outbox_lock = threading.Lock()
+
+    @property
+    def service(self):
+        """The Gmail API service, built once from the bundled (static) discovery document."""
+        if self._service is None:
+            self._service = build(
+                "gmail",
+                "v1",
+                credentials=self.creds,
+                static_discovery=True,
+                cache_discovery=False,
+            )
+        return self._service
 
     def _authenticate(self):
         creds = None
@@ -47,33 +73,120 @@ class GmailClient:
                 token.write(creds.to_json())
         return creds
 
+    @staticmethod
+    def _build_message(to: str, subject: str, content: str, html_content: str = None):
+        message = EmailMessage()
+        message["To"] = to
+        message["From"] = "me"
+        message["Subject"] = subject
+
+        # Add plain text part
+        message.set_content(content)
+
+        # Add HTML part if provided
+        if html_content:
+            message.add_alternative(html_content, subtype="html")
+
+        # encoded message
+        encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
+        return {"raw": encoded_message}
+
+    def send_message(
+        self, to: str, subject: str, content: str, html_content: str = None
+    ) -> dict:
+        """Sends an email using the Gmail API, raising HttpError on failure."""
+        create_message = self._build_message(to, subject, content, html_content)
+
+        def send():
+            # Hold the lock only for the HTTP call, not while waiting on the limiter
+            with self._lock:
+                request = (
+                    self.service.users()
+                    .messages()
+                    .send(userId="me", body=create_message)
+                )
+                return request.execute()
+
+        # The outbox owns retries, so the limiter only paces sends
+        return limiter("gmail").call_once(send)
+
     def send_email(self, to: str, subject: str, content: str, html_content: str = None):
         """Sends an email using the Gmail API."""
         try:
-            service = build("gmail", "v1", credentials=self.creds)
-            message = EmailMessage()
-            message["To"] = to
-            message["From"] = "me"
-            message["Subject"] = subject
-
-            # Add plain text part
-            message.set_content(content)
-
-            # Add HTML part if provided
-            if html_content:
-                message.add_alternative(html_content, subtype="html")
-
-            # encoded message
-            encoded_message = base64.urlsafe_b64encode(message.as_bytes()).decode()
-
-            create_message = {"raw": encoded_message}
-            send_message = (
-                service.users()
-                .messages()
-                .send(userId="me", body=create_message)
-                .execute()
-            )
+            send_message = self.send_message(to, subject, content, html_content)
         except HttpError as error:
             print(f"An error occurred: {error}")
             return None
         return send_message
+
+    @property
+    def outbox(self) -> EmailOutbox:
+        """The background outbox, started on first use."""
+        if self._outbox is None:
+            with self._outbox_lock:
+                if self._outbox is None:
+                    # Anchored to the project root, so every entry point shares one outbox
+                    self._outbox = EmailOutbox(
+                        self,
+                        os.getenv(
+                            "GMAIL_OUTBOX_PATH", str(ROOT_DIR / "gmail_outbox.db")
+                        ),
+                    )
+        return self._outbox
+
+    def queue_email(
+        self,
+        to: str,
+        subject: str,
+        content: str,
+        html_content: str = None,
+        expires_in: float = None,
+    ) -> str:
+        """Queues an email for background delivery and returns its delivery id."""
+        return self.outbox.enqueue(to, subject, content, html_content, expires_in)
+
+    def delivery_status(self, delivery_id: str) -> dict | None:
+        return self.outbox.status(delivery_id)
+
+    def resend_email(self, delivery_id: str) -> bool:
+        return self.outbox.resend(delivery_id)
+
+    def send_many(self, emails: list[dict], return_exceptions: bool = False) -> list:
+        """Sends several emails through Gmail batch requests.
+
+        Each email is a dict of send_email's arguments (to, subject, content and
+        optionally html_content). Returns the sent message per email, in order; a
+        failed email gets None, or its exception if return_exceptions is set.
+        """
+        results = [None] * len(emails)
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                print(f"An error occurred sending email {request_id}: {exception}")
+                if return_exceptions:
+                    results[int(request_id)] = exception
+            else:
+                results[int(request_id)] = response
+
+        def send_batch(indices: range):
+            with self._lock:
+                batch = self.service.new_batch_http_request(callback=callback)
+                for i in indices:
+                    batch.add(
+                        self.service.users()
+                        .messages()
+                        .send(userId="me", body=self._build_message(**emails[i])),
+                        request_id=str(i),
+                    )
+                batch.execute()
+
+        for start in range(0, len(emails), self.BATCH_SIZE):
+            indices = range(start, min(start + self.BATCH_SIZE, len(emails)))
+            try:
+                limiter("gmail").call_once(send_batch, indices)
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+                if return_exceptions:
+                    for i in indices:
+                        results[i] = results[i] or error
+        return results
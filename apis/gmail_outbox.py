@@ -0,0 +1,294 @@
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+from apis.rate_limit import is_throttled
+
+
+class EmailOutbox:
+    """Durable SQLite queue of outgoing emails, delivered by a background thread.
+
+    enqueue() commits the email and returns a delivery id right away; the worker
+    sends due emails (in Gmail batches when several are waiting). This is the only
+    layer that retries Gmail sends: throttled sends and failures to connect are
+    retried with jittered exponential backoff. 5xx errors and timeouts are not,
+    since the email may already have gone out.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id TEXT PRIMARY KEY,
+            to_addr TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            content TEXT NOT NULL,
+            html_content TEXT,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            message_id TEXT,
+            expires_at REAL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+    """
+
+    # Emails stuck in 'sending' longer than this were orphaned by a crashed process
+    STALE_SENDING_SECONDS = 600
+
+    def __init__(
+        self,
+        gmail_client,
+        db_path: str,
+        max_attempts: int = 5,
+        base_delay: float = 5.0,
+        max_delay: float = 600.0,
+    ):
+        self.gmail_client = gmail_client
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(self.SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "expires_at" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN expires_at REAL")
+        self._conn.commit()
+
+        self._worker = threading.Thread(target=self._run, name="gmail-outbox", daemon=True)
+        self._worker.start()
+
+    def enqueue(
+        self,
+        to: str,
+        subject: str,
+        content: str,
+        html_content: str = None,
+        expires_in: float = None,
+    ) -> str:
+        """Durably queues an email and returns its delivery id.
+
+        An email still undelivered `expires_in` seconds from now is dropped
+        (status 'expired') instead of being sent late.
+        """
+        delivery_id = uuid.uuid4().hex
+        now = time.time()
+        expires_at = now + expires_in if expires_in is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO outbox (id, to_addr, subject, content, html_content, status,
+                                    next_attempt_at, expires_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)
+                """,
+                (delivery_id, to, subject, content, html_content, now, expires_at, now, now),
+            )
+            self._conn.commit()
+        self._wake.set()
+        return delivery_id
+
+    def status(self, delivery_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT id, to_addr, subject, status, attempts, next_attempt_at,
+                       last_error, message_id
+                FROM outbox WHERE id = ?
+                """,
+                (delivery_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = [
+            "id",
+            "to",
+            "subject",
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "message_id",
+        ]
+        return dict(zip(keys, row))
+
+    def resend(self, delivery_id: str) -> bool:
+        """Requeues an 'unknown', 'failed' or 'expired' email. Returns False if there is none."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE outbox SET status = 'queued', attempts = 0, next_attempt_at = ?, "
+                "expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN ('unknown', 'failed', 'expired')",
+                (time.time(), time.time(), delivery_id),
+            )
+            self._conn.commit()
+        self._wake.set()
+        return bool(cursor.rowcount)
+
+    def flush(self, timeout: float = 60, delivery_ids: list[str] = None) -> bool:
+        """Waits until nothing is queued or sending. Returns False on timeout.
+
+        With delivery_ids, waits only for those emails, so other processes'
+        emails backing off in the shared outbox don't hold the caller up.
+        """
+        deadline = time.time() + timeout
+        # Rows orphaned in 'sending' by a dead worker are not worth waiting on
+        sql = (
+            "SELECT COUNT(*) FROM outbox WHERE (status = 'queued' "
+            "OR (status = 'sending' AND updated_at >= ?))"
+        )
+        if delivery_ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(delivery_ids))})"
+        while time.time() < deadline:
+            with self._lock:
+                (pending,) = self._conn.execute(
+                    sql,
+                    (time.time() - self.STALE_SENDING_SECONDS, *(delivery_ids or [])),
+                ).fetchone()
+            if not pending:
+                return True
+            self._wake.set()
+            time.sleep(0.2)
+        return False
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._claim_due()
+                if batch:
+                    self._deliver(batch)
+                    continue
+                self._wake.wait(timeout=self._seconds_until_next_due())
+                self._wake.clear()
+            except Exception as e:
+                print(f"Error in email outbox worker: {e}")
+                time.sleep(self.base_delay)
+
+    def _claim_due(self) -> list[tuple]:
+        now = time.time()
+        with self._lock:
+            # Emails orphaned mid-send by a process that died or was cut short may
+            # already have gone out, so only an explicit resend() sends them again
+            self._conn.execute(
+                "UPDATE outbox SET status = 'unknown', updated_at = ?, last_error = ? "
+                "WHERE status = 'sending' AND updated_at < ?",
+                (
+                    now,
+                    "Sender stopped mid-send; the email may or may not have been delivered",
+                    now - self.STALE_SENDING_SECONDS,
+                ),
+            )
+            self._conn.execute(
+                "UPDATE outbox SET status = 'expired', updated_at = ? "
+                "WHERE status = 'queued' AND expires_at IS NOT NULL AND expires_at <= ?",
+                (now, now),
+            )
+            rows = self._conn.execute(
+                """
+                SELECT id, to_addr, subject, content, html_content, attempts
+                FROM outbox
+                WHERE status = 'queued' AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+                """,
+                (now, self.gmail_client.BATCH_SIZE),
+            ).fetchall()
+
+            claimed = []
+            for row in rows:
+                # Another process sharing the database may have claimed it first
+                cursor = self._conn.execute(
+                    "UPDATE outbox SET status = 'sending', updated_at = ? "
+                    "WHERE id = ? AND status = 'queued'",
+                    (now, row[0]),
+                )
+                if cursor.rowcount:
+                    claimed.append(row)
+            self._conn.commit()
+        return claimed
+
+    def _seconds_until_next_due(self) -> float | None:
+        with self._lock:
+            # Also wake up to reclaim emails another worker left in 'sending'
+            (next_due,) = self._conn.execute(
+                "SELECT MIN(due) FROM ("
+                "SELECT next_attempt_at AS due FROM outbox WHERE status = 'queued' "
+                "UNION ALL SELECT updated_at + ? FROM outbox WHERE status = 'sending')",
+                (self.STALE_SENDING_SECONDS,),
+            ).fetchone()
+        return None if next_due is None else max(0.0, next_due - time.time())
+
+    def _deliver(self, batch: list[tuple]):
+        emails = [
+            {"to": to, "subject": subject, "content": content, "html_content": html}
+            for _, to, subject, content, html, _ in batch
+        ]
+        if len(emails) == 1:
+            try:
+                results = [self.gmail_client.send_message(**emails[0])]
+            except Exception as e:
+                results = [e]
+        else:
+            try:
+                results = self.gmail_client.send_many(emails, return_exceptions=True)
+            except Exception as e:
+                results = [e] * len(emails)
+
+        for (delivery_id, to, *_, attempts), result in zip(batch, results):
+            attempts += 1
+            if result is None:
+                result = RuntimeError("Gmail returned no response")
+            if isinstance(result, dict):
+                self._update(delivery_id, "sent", attempts, message_id=result.get("id"))
+                print(f"Email {delivery_id} delivered to {to}.")
+            elif (delay := self._retry_delay(result, attempts)) is not None:
+                self._update(
+                    delivery_id,
+                    "queued",
+                    attempts,
+                    error=str(result),
+                    next_attempt_at=time.time() + delay,
+                )
+                print(f"Email {delivery_id} failed ({result}), retrying in {delay:.0f}s.")
+            else:
+                self._update(delivery_id, "failed", attempts, error=str(result))
+                print(f"Email {delivery_id} to {to} failed permanently: {result}")
+
+    def _retry_delay(self, error: Exception, attempts: int) -> float | None:
+        """Returns how long to wait before resending, or None if it must not be retried."""
+        retryable, retry_after = is_throttled(error, idempotent=False)
+        if not retryable or attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.5)
+        # Never retry sooner than the server's Retry-After
+        return max(delay, min(self.max_delay, retry_after or 0))
+
+    def _update(
+        self,
+        delivery_id: str,
+        status: str,
+        attempts: int,
+        error: str = None,
+        message_id: str = None,
+        next_attempt_at: float = None,
+    ):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE outbox
+                SET status = ?, attempts = ?, last_error = ?, message_id = ?,
+                    next_attempt_at = COALESCE(?, next_attempt_at), updated_at = ?
+                WHERE id = ?
+                """,
+                (status, attempts, error, message_id, next_attempt_at, now, delivery_id),
+            )
+            self._conn.commit()
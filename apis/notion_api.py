@@ -1,17 +1,127 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from notion_client import Client
+from apis.notion_mirror import NotionMirror, due_before_bound
+from apis.rate_limit import limiter
 from models.task import NotionTask
 
 
+def sort_tasks(tasks: list[dict]) -> list[dict]:
+    """Sorts tasks by due_date. Tasks with no due_date go to the end."""
+    tasks.sort(key=lambda x: (x["due_date"] is None, x["due_date"]))
+    return tasks
+
+
+def filter_tasks(
+    tasks: list[dict], due_before: str = None, task_type: str = None
+) -> list[dict]:
+    """Filters tasks the same way NotionMirror.query_tasks does."""
+    if due_before:
+        operator, bound = due_before_bound(due_before)
+        tasks = [
+            t
+            for t in tasks
+            if t["due_date"] is not None
+            and (t["due_date"] < bound if operator == "<" else t["due_date"] <= bound)
+        ]
+    if task_type:
+        tasks = [t for t in tasks if task_type in t["task_types"]]
+    return tasks
+
+
+def copy_tasks(tasks: list[dict]) -> list[dict]:
+    return [{**t, "task_types": list(t["task_types"])} for t in tasks]
+
+
+class TaskCache:
+    """Process-wide cache of pending tasks per data source.
+
+    Writes made through NotionClient update the cached list in place, so reads
+    stay correct without another query as long as the entry is fresh.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[list[dict], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_id: str, ttl_seconds: float) -> list[dict] | None:
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is None or time.time() - entry[1] > ttl_seconds:
+                return None
+            return copy_tasks(entry[0])
+
+    def set(self, source_id: str, tasks: list[dict]):
+        with self._lock:
+            self._entries[source_id] = (copy_tasks(tasks), time.time())
+
+    def upsert(self, source_id: str, task: dict):
+        """Adds or replaces a task, dropping it if it is now Done."""
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is None:
+                return
+            tasks = [t for t in entry[0] if t["id"] != task["id"]]
+            if task["status"] != "Done":
+                tasks.append(copy_tasks([task])[0])
+            self._entries[source_id] = (sort_tasks(tasks), entry[1])
+
+    def update_status(self, source_id: str, page_id: str, status: str):
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is None:
+                return
+            tasks = entry[0]
+            if status == "Done":
+                tasks = [t for t in tasks if t["id"] != page_id]
+            else:
+                for t in tasks:
+                    if t["id"] == page_id:
+                        t["status"] = status
+            self._entries[source_id] = (tasks, entry[1])
+
+    def invalidate(self, source_id: str = None):
+        with self._lock:
+            if source_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(source_id, None)
+
+
+task_cache = TaskCache()
+
+
 class NotionClient:
+    # Largest page size the Notion query API accepts
+    MAX_PAGE_SIZE = 100
+    # Writes in flight at once for batch operations; the rate limiter sets the pace
+    MAX_CONCURRENT_WRITES = 3
+
     def __init__(
-        self, token: str = None, database_id: str = None, source_id: str = None
+        self,
+        token: str = None,
+        database_id: str = None,
+        source_id: str = None,
+        cache_ttl: float = None,
+        mirror_path: str = None,
     ):
         self.token = token or os.getenv("NOTION_TOKEN")
         self.database_id = database_id or os.getenv("NOTION_DATABASE_ID")
         self.source_id = source_id or os.getenv("NOTION_SOURCE_ID")
+        self.cache_ttl = (
+            cache_ttl
+            if cache_ttl is not None
+            else float(os.getenv("NOTION_TASK_CACHE_TTL", "60"))
+        )
         self.client = Client(auth=self.token)
 
+        # Optional local SQLite mirror that serves task reads instead of the API
+        mirror_path = mirror_path or os.getenv("NOTION_MIRROR_PATH")
+        self.mirror = NotionMirror.shared(self, mirror_path) if mirror_path else None
+
     def add_task(self, task: NotionTask):
         children = []
         if task.description:
@@ -48,49 +158,110 @@ class NotionClient:
         if children:
             payload["children"] = children
 
-        return self.client.pages.create(**payload)
+        # Retrying a create after a 5xx/timeout could duplicate the task
+        page = limiter("notion").call_write(self.client.pages.create, **payload)
+        task_cache.upsert(self.source_id, self._parse_task(page))
+        if self.mirror is not None:
+            self.mirror.upsert_page(page)
+        return page
 
-    def get_pending_tasks(self):
-        """Fetches tasks that are not 'Done'."""
-        results = self.client.data_sources.query(
-            data_source_id=self.source_id,
-            filter={"property": "Status", "status": {"does_not_equal": "Done"}},
-        ).get("results", [])
+    def get_pending_tasks(
+        self,
+        use_cache: bool = True,
+        limit: int = None,
+        due_before: str = None,
+        task_type: str = None,
+    ):
+        """Fetches tasks that are not 'Done', served from the task cache when fresh.
 
-        tasks = []
-        for page in results:
-            props = page.get("properties", {})
-            task_name = ""
-            if "Task" in props and props["Task"]["title"]:
-                task_name = props["Task"]["title"][0]["text"]["content"]
+        With a limit, only the first `limit` tasks by due date are fetched.
+        due_before (an ISO date, inclusive) and task_type narrow the result; with
+        the mirror enabled they run as indexed SQLite queries.
+        """
+        if due_before or task_type:
+            if self.mirror is not None:
+                return self.mirror.get_pending_tasks(
+                    limit=limit, due_before=due_before, task_type=task_type
+                )
+            tasks = filter_tasks(self.get_pending_tasks(use_cache), due_before, task_type)
+            return tasks[:limit] if limit else tasks
 
-            status = props.get("Status", {}).get("status", {}).get("name", "Unknown")
+        if use_cache:
+            tasks = task_cache.get(self.source_id, self.cache_ttl)
+            if tasks is not None:
+                return tasks[:limit] if limit else tasks
 
-            task_types = []
-            if "Type" in props:
-                task_types = [t["name"] for t in props["Type"].get("multi_select", [])]
+        if self.mirror is not None:
+            tasks = self.mirror.get_pending_tasks(limit=limit)
+        else:
+            tasks = sort_tasks(list(self.iter_pending_tasks(limit=limit)))
+        # Only a complete result set can stand in for future reads
+        if limit is None:
+            task_cache.set(self.source_id, tasks)
+        return tasks
 
-            due_date = None
-            if "Due Date" in props and props["Due Date"].get("date"):
-                due_date = props["Due Date"]["date"]["start"]
+    def iter_pending_tasks(self, page_size: int = 100, limit: int = None):
+        """Yields tasks that are not 'Done' by due date, one API page at a time.
 
-            tasks.append(
-                {
-                    "id": page["id"],
-                    "task_name": task_name,
-                    "status": status,
-                    "task_types": task_types,
-                    "due_date": due_date,
-                }
+        Follows Notion's next_cursor until every page is read or `limit` tasks have
+        been yielded. Tasks with no due date come last.
+        """
+        page_size = min(page_size, self.MAX_PAGE_SIZE)
+        cursor = None
+        yielded = 0
+        while True:
+            kwargs = {"start_cursor": cursor} if cursor else {}
+            if limit:
+                kwargs["page_size"] = min(page_size, limit - yielded)
+            else:
+                kwargs["page_size"] = page_size
+
+            response = limiter("notion").call(
+                self.client.data_sources.query,
+                data_source_id=self.source_id,
+                filter={"property": "Status", "status": {"does_not_equal": "Done"}},
+                sorts=[{"property": "Due Date", "direction": "ascending"}],
+                **kwargs,
             )
+            for page in response.get("results", []):
+                yield self._parse_task(page)
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
 
-        # Sort tasks by due_date. Tasks with no due_date go to the end.
-        tasks.sort(key=lambda x: (x["due_date"] is None, x["due_date"]))
-        return tasks
+            if not response.get("has_more"):
+                return
+            cursor = response.get("next_cursor")
+
+    @staticmethod
+    def _parse_task(page: dict) -> dict:
+        props = page.get("properties", {})
+        task_name = ""
+        if "Task" in props and props["Task"]["title"]:
+            task_name = props["Task"]["title"][0]["text"]["content"]
+
+        status = props.get("Status", {}).get("status", {}).get("name", "Unknown")
+
+        task_types = []
+        if "Type" in props:
+            task_types = [t["name"] for t in props["Type"].get("multi_select", [])]
+
+        due_date = None
+        if "Due Date" in props and props["Due Date"].get("date"):
+            due_date = props["Due Date"]["date"]["start"]
+
+        return {
+            "id": page["id"],
+            "task_name": task_name,
+            "status": status,
+            "task_types": task_types,
+            "due_date": due_date,
+        }
 
     def update_task_status(self, page_id: str, status: str):
         """Updates the status of a Notion page (task)."""
-        return self.client.pages.update(
+        page = limiter("notion").call(
+            self.client.pages.update,
             page_id=page_id,
             properties={
                 "Status": {
@@ -98,3 +269,33 @@ class NotionClient:
                 },
             },
         )
+        task_cache.update_status(self.source_id, page_id, status)
+        if self.mirror is not None:
+            self.mirror.upsert_page(page)
+        return page
+
+    def add_tasks(self, tasks: list[NotionTask]) -> list:
+        """Adds several tasks concurrently, paced by the shared Notion rate limiter.
+
+        Returns the created page or the raised exception for each task, in order.
+        """
+        return self._run_concurrently(self.add_task, [(task,) for task in tasks])
+
+    def update_task_statuses(self, page_ids: list[str], status: str) -> list:
+        """Updates several tasks' status concurrently, paced by the shared Notion rate limiter.
+
+        Returns the updated page or the raised exception for each page, in order.
+        """
+        return self._run_concurrently(
+            self.update_task_status, [(page_id, status) for page_id in page_ids]
+        )
+
+    def _run_concurrently(self, func, calls: list[tuple]) -> list:
+        def call(args):
+            try:
+                return func(*args)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_WRITES) as pool:
+            return list(pool.map(call, calls))
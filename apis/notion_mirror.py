@@ -0,0 +1,328 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from apis.rate_limit import limiter
+
+
+def due_before_bound(due_before: str) -> tuple[str, str]:
+    """Returns (operator, value) for comparing ISO due dates against due_before.
+
+    A date-only due_before includes the whole day, so tasks due at any time that
+    day (stored as full datetimes) match too.
+    """
+    if len(due_before) == 10:
+        next_day = datetime.date.fromisoformat(due_before) + datetime.timedelta(days=1)
+        return "<", next_day.isoformat()
+    return "<=", due_before
+
+
+class NotionMirror:
+    """Local SQLite mirror of the Notion task database.
+
+    sync() pulls only pages whose last_edited_time is at or after the stored sync
+    cursor, so after the first full pull each sync costs one small query. Reads go
+    to SQLite with indexed filters on status, due date and type.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            task_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            due_date TEXT,
+            last_edited_time TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks (status, due_date);
+        CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks (due_date);
+        CREATE TABLE IF NOT EXISTS task_types (
+            task_id TEXT NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+            type TEXT NOT NULL,
+            PRIMARY KEY (task_id, type)
+        );
+        CREATE INDEX IF NOT EXISTS idx_task_types_type ON task_types (type);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    _shared: dict[str, "NotionMirror"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        notion_client,
+        db_path: str,
+        sync_interval: float = None,
+        full_sync_interval: float = None,
+    ):
+        self.notion_client = notion_client
+        self.db_path = db_path
+        self.sync_interval = (
+            sync_interval
+            if sync_interval is not None
+            else float(os.getenv("NOTION_MIRROR_SYNC_INTERVAL", "60"))
+        )
+        # Deleted pages never show up in incremental pulls, so periodically re-pull
+        # everything to drop them
+        self.full_sync_interval = (
+            full_sync_interval
+            if full_sync_interval is not None
+            else float(os.getenv("NOTION_MIRROR_FULL_SYNC_INTERVAL", str(24 * 3600)))
+        )
+        # _lock guards the connection; _sync_lock makes concurrent syncs single-flight
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_sync = 0.0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @classmethod
+    def shared(cls, notion_client, db_path: str) -> "NotionMirror":
+        """Returns the process-wide mirror for db_path, creating it on first use."""
+        with cls._shared_lock:
+            if db_path not in cls._shared:
+                cls._shared[db_path] = cls(notion_client, db_path)
+            return cls._shared[db_path]
+
+    def sync(self, full: bool = False) -> int:
+        """Pulls pages edited since the last sync (or everything if full). Returns the count.
+
+        Pages are fetched without holding the database lock, so reads and
+        write-throughs keep working during the pull; they are then applied in one
+        short transaction. Only one sync runs at a time.
+        """
+        with self._sync_lock:
+            return self._sync(full)
+
+    def sync_if_stale(self):
+        if not self._is_stale():
+            return
+        with self._sync_lock:
+            # Another thread may have synced while we waited
+            if not self._is_stale():
+                return
+            with self._lock:
+                last_full_sync = float(self._get_state("last_full_sync") or 0)
+            self._sync(full=time.time() - last_full_sync > self.full_sync_interval)
+
+    def _is_stale(self) -> bool:
+        return time.time() - self._last_sync > self.sync_interval
+
+    def _sync(self, full: bool) -> int:
+        with self._lock:
+            cursor = None if full else self._get_state("cursor")
+        started_at = datetime.datetime.now(datetime.timezone.utc)
+        pages = self._fetch_pages(cursor)
+
+        newest = cursor
+        for page in pages:
+            edited = page.get("last_edited_time")
+            if edited and (newest is None or edited > newest):
+                newest = edited
+
+        with self._lock:
+            try:
+                for page in pages:
+                    self._upsert(page)
+                if full:
+                    self._drop_unseen(pages, started_at)
+                if newest:
+                    self._set_state("cursor", newest)
+                if full:
+                    self._set_state("last_full_sync", str(time.time()))
+                self._conn.commit()
+            except Exception:
+                # Never leave a half-applied mirror behind
+                self._conn.rollback()
+                raise
+            self._last_sync = time.time()
+        return len(pages)
+
+    def _fetch_pages(self, cursor: str | None) -> list[dict]:
+        query = {
+            "data_source_id": self.notion_client.source_id,
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+            "page_size": self.notion_client.MAX_PAGE_SIZE,
+        }
+        if cursor:
+            # last_edited_time is minute-granular, so on_or_after may re-pull a few
+            # pages; upserts make that harmless
+            query["filter"] = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": cursor},
+            }
+
+        pages = []
+        start_cursor = None
+        while True:
+            kwargs = {"start_cursor": start_cursor} if start_cursor else {}
+            response = limiter("notion").call(
+                self.notion_client.client.data_sources.query, **query, **kwargs
+            )
+            pages.extend(response.get("results", []))
+            if not response.get("has_more"):
+                return pages
+            start_cursor = response.get("next_cursor")
+
+    def _drop_unseen(self, pages: list[dict], started_at: datetime.datetime):
+        """Deletes tasks a full pull didn't return, i.e. pages deleted in Notion.
+
+        Tasks edited after the pull began (minus a minute, as Notion's timestamps
+        are minute-granular) are kept, since they may have been written through
+        while the pull was running.
+        """
+        cutoff = (started_at - datetime.timedelta(minutes=1)).strftime(
+            "%Y-%m-%dT%H:%M:%S.000Z"
+        )
+        self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+        self._conn.execute("DELETE FROM seen")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO seen (id) VALUES (?)", [(p["id"],) for p in pages]
+        )
+        self._conn.execute(
+            "DELETE FROM tasks WHERE id NOT IN (SELECT id FROM seen) "
+            "AND (last_edited_time IS NULL OR last_edited_time < ?)",
+            (cutoff,),
+        )
+
+    def upsert_page(self, page: dict):
+        """Writes a page returned by a create/update call straight into the mirror."""
+        with self._lock:
+            self._upsert(page)
+            self._conn.commit()
+
+    def query_tasks(
+        self,
+        exclude_status: str = "Done",
+        status: str = None,
+        due_before: str = None,
+        task_type: str = None,
+        limit: int = None,
+    ) -> list[dict]:
+        """Queries mirrored tasks, ordered by due date with undated tasks last."""
+        clauses, params = [], []
+        if exclude_status:
+            clauses.append("t.status != ?")
+            params.append(exclude_status)
+        if status:
+            clauses.append("t.status = ?")
+            params.append(status)
+        if due_before:
+            operator, bound = due_before_bound(due_before)
+            clauses.append(f"t.due_date IS NOT NULL AND t.due_date {operator} ?")
+            params.append(bound)
+        if task_type:
+            clauses.append("t.id IN (SELECT task_id FROM task_types WHERE type = ?)")
+            params.append(task_type)
+
+        sql = "SELECT t.id, t.task_name, t.status, t.due_date FROM tasks t"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY t.due_date IS NULL, t.due_date"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            types = self._types_for([row[0] for row in rows])
+        return [
+            {
+                "id": task_id,
+                "task_name": task_name,
+                "status": task_status,
+                "task_types": types.get(task_id, []),
+                "due_date": due_date,
+            }
+            for task_id, task_name, task_status, due_date in rows
+        ]
+
+    def get_pending_tasks(
+        self, limit: int = None, due_before: str = None, task_type: str = None
+    ) -> list[dict]:
+        self.sync_if_stale()
+        return self.query_tasks(due_before=due_before, task_type=task_type, limit=limit)
+
+    def _upsert(self, page: dict):
+        if page.get("archived") or page.get("in_trash"):
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (page["id"],))
+            return
+
+        # A pull that started before a write-through must not overwrite it
+        row = self._conn.execute(
+            "SELECT last_edited_time FROM tasks WHERE id = ?", (page["id"],)
+        ).fetchone()
+        edited = page.get("last_edited_time")
+        if row and row[0] and edited and edited < row[0]:
+            return
+
+        task = self.notion_client._parse_task(page)
+        self._conn.execute(
+            """
+            INSERT INTO tasks (id, task_name, status, due_date, last_edited_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                task_name = excluded.task_name,
+                status = excluded.status,
+                due_date = excluded.due_date,
+                last_edited_time = excluded.last_edited_time
+            """,
+            (
+                task["id"],
+                task["task_name"],
+                task["status"],
+                task["due_date"],
+                page.get("last_edited_time"),
+            ),
+        )
+        self._conn.execute("DELETE FROM task_types WHERE task_id = ?", (task["id"],))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO task_types (task_id, type) VALUES (?, ?)",
+            [(task["id"], t) for t in task["task_types"]],
+        )
+
+    def _types_for(self, task_ids: list[str]) -> dict[str, list[str]]:
+        types: dict[str, list[str]] = {}
+        # Chunk to stay under SQLite's bound-parameter limit
+        for i in range(0, len(task_ids), 500):
+            chunk = task_ids[i : i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for task_id, task_type in self._conn.execute(
+                f"SELECT task_id, type FROM task_types WHERE task_id IN ({placeholders})",
+                chunk,
+            ):
+                types.setdefault(task_id, []).append(task_type)
+        return types
+
+    def _get_state(self, key: str) -> str | None:
+        row = self._conn.execute(
+            "SELECT value FROM sync_state WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str):
+        self._conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    from apis.notion_api import NotionClient
+
+    load_dotenv()
+    client = NotionClient()
+    mirror = NotionMirror(client, os.getenv("NOTION_MIRROR_PATH", "notion_mirror.db"))
+    print(f"Synced {mirror.sync(full=True)} pages.")
+    print(json.dumps(mirror.query_tasks(limit=10), indent=2))
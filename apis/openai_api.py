@@ -3,26 +3,56 @@ from typing import List, Dict, Any
 
 import numpy as np
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
+from apis.rate_limit import limiter
 from models.task import NotionTask
 from skills.utils import get_local_now
 
 load_dotenv()
 
 
+def embedding_settings() -> tuple[str, int | None]:
+    """Returns the configured embedding model and optional reduced dimension count."""
+    dimensions = os.environ.get("OPENAI_EMBEDDING_DIMENSIONS")
+    return (
+        os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large"),
+        int(dimensions) if dimensions else None,
+    )
+
+
+def embedding_model_id() -> str:
+    """Identifies the embedding space, so vectors from different settings never mix."""
+    model, dimensions = embedding_settings()
+    return f"{model}:{dimensions}" if dimensions else model
+
+
 class OpenAIClient:
     def __init__(self, api_key: str = None, model: str = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-5.1")
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled by the shared limiter so they are counted per upstream
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
+
+    def chat(self, messages: List[Dict[str, Any]], **kwargs):
+        """Creates a chat completion with the configured model."""
+        return limiter("openai").call(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=messages,
+            **kwargs,
+        )
 
     def transcribe_audio(self, file_path: str):
-        with open(file_path, "rb") as audio_file:
-            return self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-            ).text
+        # Reopen the file on every attempt so a retry doesn't upload a consumed stream
+        def transcribe():
+            with open(file_path, "rb") as audio_file:
+                return self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                )
+
+        return limiter("openai").call(transcribe).text
 
     def extract_task(self, text: str) -> NotionTask:
         messages: List[Dict[str, Any]] = [
@@ -32,7 +62,8 @@ class OpenAIClient:
             },
             {"role": "user", "content": text},
         ]
-        completion = self.client.beta.chat.completions.parse(
+        completion = limiter("openai").call(
+            self.client.beta.chat.completions.parse,
             model=self.model,
             messages=messages,
             response_format=NotionTask,
@@ -68,35 +99,103 @@ class OpenAIClient:
             {"role": "user", "content": user_prompt},
         ]
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-        )
+        response = self.chat(messages)
         return response.choices[0].message.content
 
     def generate_speech(
         self,
         text: str,
-        output_path: str,
+        output_path: str = None,
         voice: str = None,
         response_format: str = "mp3",
     ):
-        """Generates speech from text using OpenAI TTS."""
+        """Generates speech from text using OpenAI TTS.
+
+        Writes the audio to output_path if given, otherwise returns the raw bytes.
+        """
         if voice is None:
             voice = os.getenv("OPENAI_VOICE_MODEL_LEGACY", "nova")
 
-        response = self.client.audio.speech.create(
+        response = limiter("openai").call(
+            self.client.audio.speech.create,
             model="tts-1",
             voice=voice,
             input=text,
             response_format=response_format,
         )
+        if output_path is None:
+            return response.content
         response.write_to_file(output_path)
 
     def embed_text(self, text: str | list[str]) -> np.ndarray:
         """Embeds text using OpenAI embeddings."""
-        response = self.client.embeddings.create(
+        model, dimensions = embedding_settings()
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        response = limiter("openai").call(
+            self.client.embeddings.create, input=text, model=model, **kwargs
+        )
+        return np.array([d.embedding for d in response.data], dtype=np.float32)
+
+
+class AsyncOpenAIClient:
+    """Non-blocking counterpart of OpenAIClient for use inside an event loop."""
+
+    def __init__(self, api_key: str = None, model: str = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-5.1")
+        self.client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+
+    async def chat(self, messages: List[Dict[str, Any]], **kwargs):
+        """Creates a chat completion with the configured model."""
+        return await limiter("openai").acall(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=messages,
+            **kwargs,
+        )
+
+    async def transcribe_audio(self, file_path: str):
+        # Reopen the file on every attempt so a retry doesn't upload a consumed stream
+        async def transcribe():
+            with open(file_path, "rb") as audio_file:
+                return await self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                )
+
+        transcription = await limiter("openai").acall(transcribe)
+        return transcription.text
+
+    async def generate_speech(
+        self,
+        text: str,
+        output_path: str = None,
+        voice: str = None,
+        response_format: str = "mp3",
+    ):
+        """Generates speech from text using OpenAI TTS.
+
+        Writes the audio to output_path if given, otherwise returns the raw bytes.
+        """
+        if voice is None:
+            voice = os.getenv("OPENAI_VOICE_MODEL_LEGACY", "nova")
+
+        response = await limiter("openai").acall(
+            self.client.audio.speech.create,
+            model="tts-1",
+            voice=voice,
             input=text,
-            model=os.environ.get("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large"),
+            response_format=response_format,
+        )
+        if output_path is None:
+            return response.content
+        response.write_to_file(output_path)
+
+    async def embed_text(self, text: str | list[str]) -> np.ndarray:
+        """Embeds text using OpenAI embeddings."""
+        model, dimensions = embedding_settings()
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        response = await limiter("openai").acall(
+            self.client.embeddings.create, input=text, model=model, **kwargs
         )
-        return np.array([d.embedding for d in response.data])
+        return np.array([d.embedding for d in response.data], dtype=np.float32)
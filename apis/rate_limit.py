@@ -0,0 +1,292 @@
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Thread-safe token bucket: allows `rate` calls per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """Takes a token if one is available (returns 0), else returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while delay := self._try_acquire():
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Same as acquire, without blocking the event loop."""
+        waited = 0.0
+        while delay := self._try_acquire():
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+
+# Default (requests per second, burst) per upstream; override with
+# <UPSTREAM>_REQUESTS_PER_SECOND and <UPSTREAM>_BURST
+DEFAULT_LIMITS = {
+    "notion": (3, 3),
+    "openai": (20, 20),
+    "gmail": (10, 10),
+    "weather": (1, 5),
+    "discord": (5, 5),
+}
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Errors raised before a request reached the server (requests/urllib3, httpx,
+# httplib2), so retrying them can never duplicate a write
+CONNECT_ERROR_NAMES = {
+    "ConnectTimeout",
+    "ConnectError",
+    "NewConnectionError",
+    "ServerNotFoundError",
+}
+
+
+def _status_and_headers(error: Exception):
+    """Pulls the HTTP status and response headers out of the various client errors.
+
+    notion_client.APIResponseError has .status/.headers, openai errors have
+    .status_code/.response, googleapiclient's HttpError has .resp (an httplib2
+    Response, which is itself a header dict) and requests.HTTPError has .response.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        response = getattr(error, "resp", None)
+
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+
+    headers = getattr(error, "headers", None)
+    if headers is None and response is not None:
+        headers = getattr(response, "headers", None)
+        if headers is None and isinstance(response, dict):
+            headers = response
+    try:
+        status = int(status) if status is not None else None
+    except (TypeError, ValueError):
+        status = None
+    return status, headers or {}
+
+
+def _parse_retry_after(value) -> float | None:
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def failed_to_connect(error: Exception) -> bool:
+    """Whether an error (or one it was raised from) means the request was never sent."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if (
+            isinstance(error, (ConnectionRefusedError, socket.gaierror))
+            or type(error).__name__ in CONNECT_ERROR_NAMES
+        ):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def is_throttled(
+    error: Exception, idempotent: bool = True
+) -> tuple[bool, float | None]:
+    """Returns whether an error is worth retrying and the server's Retry-After, if any.
+
+    Non-idempotent calls (creates, sends) are only retried when the server
+    certainly did not act on them: throttling rejections and failures to connect.
+    A 5xx or timeout may arrive after the write was committed.
+    """
+    status, headers = _status_and_headers(error)
+    if status is None:
+        if not idempotent:
+            return failed_to_connect(error), None
+        # Transport-level failures (openai's APIConnectionError/APITimeoutError etc.)
+        name = type(error).__name__
+        retryable = isinstance(error, (ConnectionError, TimeoutError)) or name.endswith(
+            ("ConnectionError", "TimeoutError")
+        )
+        return retryable, None
+
+    # Gmail reports per-user quota exhaustion as 403 rateLimitExceeded
+    retryable = (
+        (status in RETRYABLE_STATUSES if idempotent else status == 429)
+        or (status == 403 and "rateLimitExceeded" in str(error))
+    )
+    if not retryable:
+        return False, None
+    retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    return True, _parse_retry_after(retry_after)
+
+
+class UpstreamLimiter:
+    """Rate limit and throttle-aware retries for one upstream API.
+
+    Every call first takes a token from the upstream's bucket. Throttled (429),
+    transient server (5xx) and connection failures are retried up to max_retries
+    times, waiting for the server's Retry-After when given and jittered
+    exponential backoff otherwise. Use call_write for non-idempotent calls and
+    call_once when the caller owns retries.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttles = 0
+        self.retries = 0
+        self.failures = 0
+        self.limiter_wait_seconds = 0.0
+        self.retry_delay_seconds = 0.0
+
+    def call(self, func, *args, **kwargs):
+        """Calls an idempotent func (reads, queries, embeddings)."""
+        return self._call(func, args, kwargs, True, self.max_retries)
+
+    def call_write(self, func, *args, **kwargs):
+        """Calls a non-idempotent func, retrying only failures where nothing was written."""
+        return self._call(func, args, kwargs, False, self.max_retries)
+
+    def call_once(self, func, *args, **kwargs):
+        """Paces func through the bucket without retrying it."""
+        return self._call(func, args, kwargs, False, 0)
+
+    def _call(self, func, args, kwargs, idempotent: bool, max_retries: int):
+        attempt = 0
+        while True:
+            self._record(wait=self.bucket.acquire())
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, idempotent, max_retries)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, func, *args, **kwargs):
+        """Same as call, for coroutine functions."""
+        attempt = 0
+        while True:
+            self._record(wait=await self.bucket.acquire_async())
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, True, self.max_retries)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttles": self.throttles,
+                "retries": self.retries,
+                "failures": self.failures,
+                "limiter_wait_seconds": round(self.limiter_wait_seconds, 3),
+                "retry_delay_seconds": round(self.retry_delay_seconds, 3),
+            }
+
+    def _record(self, wait: float):
+        with self._lock:
+            self.requests += 1
+            self.limiter_wait_seconds += wait
+
+    def _retry_delay(
+        self, error: Exception, attempt: int, idempotent: bool, max_retries: int
+    ) -> float | None:
+        """Returns how long to wait before retrying, or None to give up."""
+        retryable, retry_after = is_throttled(error, idempotent)
+        status, _ = _status_and_headers(error)
+        with self._lock:
+            if status == 429:
+                self.throttles += 1
+            if not retryable or attempt >= max_retries:
+                if retryable:
+                    self.failures += 1
+                return None
+
+            if retry_after is not None:
+                delay = min(self.max_delay, retry_after)
+            else:
+                backoff = min(self.max_delay, self.base_delay * 2**attempt)
+                delay = random.uniform(backoff / 2, backoff)
+            self.retries += 1
+            self.retry_delay_seconds += delay
+
+        print(f"{self.name} request failed ({error}), retrying in {delay:.1f}s...")
+        return delay
+
+
+_limiters: dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(name: str) -> UpstreamLimiter:
+    """Returns the process-wide limiter for an upstream, creating it on first use."""
+    with _limiters_lock:
+        if name not in _limiters:
+            default_rate, default_burst = DEFAULT_LIMITS.get(name, (10, 10))
+            prefix = name.upper()
+            _limiters[name] = UpstreamLimiter(
+                name,
+                rate=float(os.getenv(f"{prefix}_REQUESTS_PER_SECOND", default_rate)),
+                capacity=float(os.getenv(f"{prefix}_BURST", default_burst)),
+            )
+        return _limiters[name]
+
+
+def stats() -> dict:
+    """Throttle and retry counters for every upstream used so far."""
+    with _limiters_lock:
+        return {name: lim.stats() for name, lim in _limiters.items()}
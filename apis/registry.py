@@ -0,0 +1,76 @@
+"""Process-wide, lazily created API clients.
+
+Each client is built on first use and then shared, so its HTTP connection pool
+(and, for Gmail, its loaded credentials) stays warm across skill calls instead
+of paying a TLS handshake and credential load on every request.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+_clients = {}
+_locks: dict[str, threading.Lock] = {}
+_lock = threading.Lock()
+
+
+def _get_or_create(name: str, factory):
+    client = _clients.get(name)
+    if client is None:
+        # Per-client locks, so slow setups (e.g. Gmail auth) can run in parallel
+        with _lock:
+            client_lock = _locks.setdefault(name, threading.Lock())
+        with client_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def get_openai_client():
+    from apis.openai_api import OpenAIClient
+
+    return _get_or_create("openai", OpenAIClient)
+
+
+def get_async_openai_client():
+    from apis.openai_api import AsyncOpenAIClient
+
+    return _get_or_create("async_openai", AsyncOpenAIClient)
+
+
+def get_notion_client():
+    from apis.notion_api import NotionClient
+
+    return _get_or_create("notion", NotionClient)
+
+
+def get_discord_client():
+    from apis.discord_api import DiscordRestClient
+
+    return _get_or_create("discord", DiscordRestClient)
+
+
+def get_weather_provider():
+    from apis.weather_api import WeatherForecastProvider
+
+    return _get_or_create("weather", WeatherForecastProvider)
+
+
+def get_gmail_client():
+    from apis.gmail_api import GmailClient
+
+    return _get_or_create(
+        "gmail",
+        lambda: GmailClient(
+            credentials_path=os.getenv(
+                "GMAIL_CREDENTIALS_PATH",
+                str(ROOT_DIR / "playground/gmail_api/credentials.json"),
+            ),
+            token_path=os.getenv(
+                "GMAIL_TOKEN_PATH", str(ROOT_DIR / "playground/gmail_api/token.json")
+            ),
+        ),
+    )
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+from apis.rate_limit import RETRYABLE_STATUSES, limiter
+
+# OpenWeatherMap's 5 day forecast comes in 3-hour buckets aligned to UTC
+BUCKET_SECONDS = 3 * 3600
+
+
+class WeatherForecastProvider:
+    """Cached OpenWeatherMap 3-hour forecasts, fetched through one pooled session.
+
+    A forecast stays fresh until the next 3-hour bucket boundary. After that it is
+    still served for up to `stale_ttl` seconds while a background refresh runs, so
+    callers only wait on the network when there is no recent forecast at all.
+    If even that fetch fails, whatever cached buckets are still ahead are served.
+    """
+
+    API_URL = "https://api.openweathermap.org/data/2.5/forecast"
+
+    def __init__(
+        self,
+        api_key: str = None,
+        units: str = "imperial",
+        cache_path: str = None,
+        stale_ttl: float = None,
+        timeout: float = None,
+    ):
+        self.api_key = api_key or os.getenv("OPENWEATHERMAP_API_KEY")
+        self.units = units
+        self.cache_path = cache_path or os.getenv("WEATHER_CACHE_PATH")
+        self.stale_ttl = (
+            stale_ttl
+            if stale_ttl is not None
+            else float(os.getenv("WEATHER_STALE_TTL", str(6 * 3600)))
+        )
+        self.timeout = (
+            timeout
+            if timeout is not None
+            else float(os.getenv("WEATHER_REQUEST_TIMEOUT", "10"))
+        )
+        self.session = requests.Session()
+
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._forecasts: dict[str, dict] = self._load_cache()
+
+    def get_forecast(self, city: str, hours: int = 24) -> list[dict] | None:
+        """Returns the forecast entries covering the next `hours`, or None on failure."""
+        now = time.time()
+        with self._lock:
+            cached = self._forecasts.get(city)
+
+        if cached is None or now - cached["fetched_at"] > self.stale_ttl:
+            # An old forecast (minus its past buckets) still beats no forecast
+            cached = self._refresh(city) or cached
+        elif now >= self._fresh_until(cached["fetched_at"]):
+            self._refresh_in_background(city)
+
+        if cached is None:
+            return None
+        # Drop buckets that have already passed, which matters for stale forecasts
+        upcoming = [e for e in cached["list"] if e["dt"] + BUCKET_SECONDS > now]
+        return upcoming[: max(1, hours // 3)]
+
+    @staticmethod
+    def _fresh_until(fetched_at: float) -> float:
+        return (fetched_at // BUCKET_SECONDS + 1) * BUCKET_SECONDS
+
+    def _refresh(self, city: str) -> dict | None:
+        try:
+            forecast = {"fetched_at": time.time(), "list": self._fetch(city)}
+        except (requests.RequestException, KeyError, ValueError) as e:
+            print(f"Error retrieving weather forecast for {city}: {e}")
+            return None
+
+        with self._lock:
+            self._forecasts[city] = forecast
+            self._save_cache()
+        return forecast
+
+    def _refresh_in_background(self, city: str):
+        with self._lock:
+            if city in self._refreshing:
+                return
+            self._refreshing.add(city)
+
+        def refresh():
+            try:
+                self._refresh(city)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(city)
+
+        threading.Thread(target=refresh, name="weather-refresh", daemon=True).start()
+
+    def _fetch(self, city: str) -> list[dict]:
+        def send():
+            response = self.session.get(
+                self.API_URL,
+                params={"q": city, "appid": self.api_key, "units": self.units},
+                timeout=self.timeout,
+            )
+            # Raise on throttling/server errors so the limiter retries them
+            if response.status_code in RETRYABLE_STATUSES:
+                response.raise_for_status()
+            return response
+
+        response = limiter("weather").call(send)
+        response.raise_for_status()
+        return response.json()["list"]
+
+    def _load_cache(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading weather cache: {e}")
+            return {}
+        # Forecasts cached in other units are useless here
+        return cache.get("forecasts", {}) if cache.get("units") == self.units else {}
+
+    def _save_cache(self):
+        """Persists the cache (caller holds the lock)."""
+        if not self.cache_path:
+            return
+        try:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"units": self.units, "forecasts": self._forecasts}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving weather cache: {e}")
@@ -2,9 +2,75 @@ import yaml
 import datetime
 from pathlib import Path
 import os
+import threading
 from zoneinfo import ZoneInfo
 
 ALLOWED_ROUTINE_CATEGORIES = ["supplements", "skincare", "workouts"]
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
+
+class RoutineIndex:
+    """Per-day routine text for every category, parsed from the YAML files once.
+
+    The combined "main + day" string is precomputed for each category and day, so
+    lookups are dictionary hits. A category is re-parsed only when its file's
+    mtime changes.
+    """
+
+    def __init__(self, base_path: Path = None):
+        self.base_path = base_path or Path(__file__).parent
+        self._lock = threading.Lock()
+        self._mtimes: dict[str, float] = {}
+        self._by_day: dict[str, dict[str, str]] = {}
+        self._main: dict[str, str] = {}
+
+    def get(self, routine_type: str, day_of_week: str) -> str:
+        self._refresh(routine_type)
+        return self._by_day[routine_type].get(day_of_week, self._main[routine_type])
+
+    def get_all(self, day_of_week: str) -> dict[str, str]:
+        return {
+            category: self.get(category, day_of_week)
+            for category in ALLOWED_ROUTINE_CATEGORIES
+        }
+
+    def _refresh(self, routine_type: str):
+        path = self.base_path / f"{routine_type}.yaml"
+        mtime = os.stat(path).st_mtime
+        if self._mtimes.get(routine_type) == mtime:
+            return
+
+        with self._lock:
+            if self._mtimes.get(routine_type) == mtime:
+                return
+            with open(path, "r") as f:
+                data = yaml.safe_load(f)
+
+            main = data["main"]
+            days = set(WEEKDAYS) | {key for key in data if key != "main"}
+            self._by_day[routine_type] = {
+                day: main + "\n\n" + data[day] if day in data else main for day in days
+            }
+            self._main[routine_type] = main
+            self._mtimes[routine_type] = mtime
+
+
+routine_index = RoutineIndex()
+
+
+def _resolve_day(day_of_week: str = None) -> str:
+    if day_of_week is None:
+        local_timezone = os.environ.get("LOCAL_TIMEZONE", "UTC")
+        return datetime.datetime.now(ZoneInfo(local_timezone)).strftime("%A").lower()
+    return day_of_week.lower()
 
 
 def gather_routine_information(routine_type: str, day_of_week: str = None) -> str:
@@ -12,23 +78,12 @@ def gather_routine_information(routine_type: str, day_of_week: str = None) -> st
     if routine_type not in ALLOWED_ROUTINE_CATEGORIES:
         return f"{routine_type} is not a valid routine category. Choose from {', '.join(ALLOWED_ROUTINE_CATEGORIES)}"
 
-    base_path = Path(__file__).parent
-    with open(base_path / f"{routine_type}.yaml", "r") as f:
-        data = yaml.safe_load(f)
+    return routine_index.get(routine_type, _resolve_day(day_of_week))
 
-    content = data["main"]
 
-    if day_of_week is None:
-        local_timezone = os.environ.get("LOCAL_TIMEZONE", "UTC")
-        day_of_week = (
-            datetime.datetime.now(ZoneInfo(local_timezone)).strftime("%A").lower()
-        )
-    else:
-        day_of_week = day_of_week.lower()
-
-    if day_of_week in data:
-        content += "\n\n" + data[day_of_week]
-    return content
+def gather_all_routine_information(day_of_week: str = None) -> dict[str, str]:
+    """Returns every category's routine for a day, keyed by category."""
+    return routine_index.get_all(_resolve_day(day_of_week))
 
 
 if __name__ == "__main__":
@@ -22,6 +22,7 @@ from dotenv import load_dotenv
 
 from skills import *
 from skills.utils import get_local_now
+from tools.realtime_audio import AudioPlayer, AudioUplink
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +35,16 @@ URL = f"wss://api.openai.com/v1/realtime?model={MODEL}"
 CHANNELS = 1
 RATE = 24000
 CHUNK_SIZE = 1024
+# Milliseconds of microphone audio per WebSocket message
+UPLINK_FRAME_MS = int(os.getenv("REALTIME_UPLINK_FRAME_MS", "100"))
+# Seconds between uplink throughput reports (0 disables them)
+STATS_INTERVAL = float(os.getenv("REALTIME_STATS_INTERVAL", "0"))
+# Playback ring buffer size and the audio queued before playback (re)starts
+PLAYBACK_BUFFER_SECONDS = float(os.getenv("REALTIME_PLAYBACK_BUFFER_SECONDS", "60"))
+PLAYBACK_PREBUFFER_MS = float(os.getenv("REALTIME_PLAYBACK_PREBUFFER_MS", "100"))
+# Mute the microphone while the agent speaks. Turn off (with headphones or echo
+# cancellation) to be able to interrupt the agent mid-sentence.
+ECHO_SUPPRESSION = os.getenv("REALTIME_ECHO_SUPPRESSION", "true").lower() == "true"
 
 
 def load_config():
@@ -63,6 +74,8 @@ async def send_audio(ws, stream, state):
         return
 
     print("Microphone active. Speak now...")
+    uplink = AudioUplink(ws, RATE, frame_ms=UPLINK_FRAME_MS)
+    last_stats_at = time.monotonic()
     try:
         last_instructions_update = get_local_now().date()
 
@@ -83,9 +96,9 @@ async def send_audio(ws, stream, state):
                 await ws.send(json.dumps(session_update))
                 last_instructions_update = today
 
-            # Read audio data from stream
+            # Read a whole uplink frame per thread hop
             data = await asyncio.to_thread(
-                stream.read, CHUNK_SIZE, exception_on_overflow=False
+                stream.read, uplink.frames_per_message, exception_on_overflow=False
             )
             if not data:
                 await asyncio.sleep(0.01)
@@ -93,19 +106,24 @@ async def send_audio(ws, stream, state):
 
             # Skip sending if we are currently playing audio or just finished playing
             # This prevents a feedback loop where the agent hears its own voice.
-            if state.get("is_playing") or (
-                time.time() - state.get("last_output_at", 0) < 0.5
+            if ECHO_SUPPRESSION and (
+                state.get("is_playing")
+                or time.time() - state.get("last_output_at", 0) < 0.5
             ):
                 continue
 
-            base64_audio = base64.b64encode(data).decode("utf-8")
-            audio_event = {"type": "input_audio_buffer.append", "audio": base64_audio}
-            await ws.send(json.dumps(audio_event))
+            await uplink.send(data)
+
+            if STATS_INTERVAL and time.monotonic() - last_stats_at >= STATS_INTERVAL:
+                print(f"\n[Uplink] {uplink.stats()}")
+                last_stats_at = time.monotonic()
     except Exception as e:
         print(f"Error sending audio: {e}")
+    finally:
+        print(f"\n[Uplink] {uplink.stats()}")
 
 
-async def handle_events(ws, stream, state):
+async def handle_events(ws, player, state):
     """Receives events from the WebSocket and handles them (audio output, tool calls)."""
     try:
         while not state.get("should_shutdown"):
@@ -115,17 +133,13 @@ async def handle_events(ws, stream, state):
             # print(f"DEBUG: Received event: {event_type}") # Uncomment for full event logging
 
             if event_type == "response.audio.delta":
-                # Play back audio response
-                if stream and state.get("is_response_active"):
-                    audio_content = base64.b64decode(event["delta"])
-                    try:
-                        state["is_playing"] = True
-                        await asyncio.to_thread(stream.write, audio_content)
-                        state["last_output_at"] = time.time()
-                        state["is_playing"] = False
-                    except Exception as e:
-                        state["is_playing"] = False
-                        print(f"\nError writing to audio stream: {e}")
+                # Queue audio for the playback thread; never wait on the sound card here
+                if player and state.get("is_response_active"):
+                    player.feed(
+                        base64.b64decode(event["delta"]),
+                        item_id=event.get("item_id"),
+                        content_index=event.get("content_index", 0),
+                    )
                 continue
 
             elif event_type == "response.audio_transcript.delta":
@@ -171,10 +185,25 @@ async def handle_events(ws, stream, state):
 
             elif event_type == "input_audio_buffer.speech_started":
                 print("\nSpeech detected...")
-                if state.get("is_response_active"):
+                # Stop local playback first, then tell the server what was heard
+                cut_off = player.interrupt() if player else None
+                was_active = state.get("is_response_active")
+                if was_active:
                     # Send cancel event to server to stop current response generation
                     await ws.send(json.dumps({"type": "response.cancel"}))
                     state["is_response_active"] = False
+                if cut_off:
+                    item_id, content_index, audio_end_ms = cut_off
+                    # Drop the unheard audio from the conversation so the model's
+                    # context matches what was actually played
+                    truncate_event = {
+                        "type": "conversation.item.truncate",
+                        "item_id": item_id,
+                        "content_index": content_index,
+                        "audio_end_ms": audio_end_ms,
+                    }
+                    await ws.send(json.dumps(truncate_event))
+                if was_active or cut_off:
                     print("[Interrupted]")
 
             elif event_type == "response.cancel.done":
@@ -279,6 +308,7 @@ async def run_agent():
     # Initialize PyAudio
     input_stream = None
     output_stream = None
+    player = None
     p = None
 
     if pyaudio:
@@ -342,13 +372,25 @@ async def run_agent():
                 "is_playing": False,
                 "should_shutdown": False,
             }
+            if output_stream:
+                player = AudioPlayer(
+                    output_stream,
+                    state,
+                    RATE,
+                    chunk_frames=CHUNK_SIZE,
+                    buffer_seconds=PLAYBACK_BUFFER_SECONDS,
+                    prebuffer_ms=PLAYBACK_PREBUFFER_MS,
+                )
             await asyncio.gather(
                 send_audio(ws, input_stream, state),
-                handle_events(ws, output_stream, state),
+                handle_events(ws, player, state),
             )
     except Exception as e:
         print(f"Connection error: {e}")
     finally:
+        if player:
+            player.close()
+            print(f"[Playback] {player.stats()}")
         if input_stream:
             try:
                 input_stream.stop_stream()
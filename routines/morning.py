@@ -1,6 +1,8 @@
 import sys
 import os
 import asyncio
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import datetime
 
@@ -9,84 +11,93 @@ root_dir = Path(__file__).parent.parent
 sys.path.append(str(root_dir))
 
 from dotenv import load_dotenv
-from apis.openai_api import OpenAIClient
-from apis.gmail_api import GmailClient
-from apis.notion_api import NotionClient
+from apis.registry import (
+    get_discord_client,
+    get_gmail_client,
+    get_notion_client,
+    get_openai_client,
+)
 from skills.utils import get_next_24hr_weather_forecast, get_local_now
-from blueprint_routine.blueprint_skills import gather_routine_information
+from blueprint_routine.blueprint_skills import gather_all_routine_information
 
 
-async def send_discord_message(token, user_id, content):
-    """Sends a message to a Discord user via DM."""
-    import discord
+def send_discord_message(user_id, content):
+    """Sends a message to a Discord user via DM over the REST API."""
+    try:
+        get_discord_client().send_dm(user_id, f"<@{user_id}>\n\n{content}")
+        print(f"Discord message sent to {user_id}.")
+    except Exception as e:
+        print(f"Error in send_discord_message: {e}")
 
-    intents = discord.Intents.default()
-    async with discord.Client(intents=intents) as client:
-        try:
-            # We need to login and start the client to be able to fetch user
-            # But discord.Client as a context manager handles cleanup.
-            # However, fetch_user needs the client to be logged in.
-
-            # Use a task to handle the actual work once ready
-            ready_event = asyncio.Event()
-
-            @client.event
-            async def on_ready():
-                ready_event.set()
-
-            # Start client in a task
-            client_task = asyncio.create_task(client.start(token))
-
-            # Wait for ready
-            try:
-                await asyncio.wait_for(ready_event.wait(), timeout=30)
-                user = await client.fetch_user(int(user_id))
-                if user:
-                    full_content = f"<@{user_id}>\n\n{content}"
-                    await user.send(full_content)
-                    print(f"Discord message sent to {user.name}.")
-                else:
-                    print(f"Error: Could not find Discord user with ID {user_id}")
-            except asyncio.TimeoutError:
-                print("Error: Discord client timed out waiting to be ready.")
-            except Exception as e:
-                print(f"Error during Discord message sending: {e}")
-            finally:
-                # Stop the client
-                await client.close()
-                await client_task
-        except Exception as e:
-            print(f"Error in send_discord_message: {e}")
 
+class StageTimer:
+    """Records how long each stage of the routine takes, including concurrent ones."""
 
-def main():
-    # Load environment variables from the root directory
-    load_dotenv(dotenv_path=root_dir / ".env")
+    def __init__(self):
+        self.timings = {}
 
-    openai_client = OpenAIClient()
-    gmail_client = GmailClient(
-        credentials_path=str(root_dir / "playground/gmail_api/credentials.json"),
-        token_path=str(root_dir / "playground/gmail_api/token.json"),
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    async def run(self, name: str, func, *args):
+        """Runs a blocking function in a worker thread, timing it as its own stage."""
+        with self.stage(name):
+            return await asyncio.to_thread(func, *args)
+
+    def report(self):
+        print("\n--- Morning routine timing ---")
+        for name, seconds in self.timings.items():
+            print(f"{name:>16}: {seconds * 1000:8.0f} ms")
+
+
+def deliver_email(gmail_client, to: str, subject: str, content: str):
+    # A morning note delivered the next day is worse than none
+    delivery_id = gmail_client.queue_email(
+        to=to,
+        subject=subject,
+        content=content,
+        expires_in=float(os.getenv("MORNING_NOTE_TTL", str(12 * 3600))),
     )
-    notion_client = NotionClient()
+    print(f"Morning routine email queued for {to}.")
+    # The outbox sends in the background; give it a chance to finish before exiting.
+    # Anything still pending stays queued and is retried by the next outbox user.
+    if not gmail_client.outbox.flush(timeout=60, delivery_ids=[delivery_id]):
+        print(
+            "Email still pending in the outbox; it will be retried later, "
+            "or dropped after MORNING_NOTE_TTL."
+        )
+
+
+async def run_morning_routine():
+    timer = StageTimer()
 
     recipient_email = os.getenv("REPORT_RECIPIENT_EMAIL")
     if not recipient_email:
         print("Error: REPORT_RECIPIENT_EMAIL not found in environment.")
         return
 
-    # 1. Gather Weather
-    weather_info = get_next_24hr_weather_forecast()
-
-    # 2. Gather Routine
-    supplements = gather_routine_information("supplements")
-    skincare = gather_routine_information("skincare")
-    workouts = gather_routine_information("workouts")
-
-    # 3. Gather Notion Tasks
-    tasks = notion_client.get_pending_tasks()
+    local_today = get_local_now().date().isoformat()
+
+    # 1. Gather weather, routine, Notion tasks (and Gmail credentials) concurrently
+    with timer.stage("gather (total)"):
+        weather_info, routines, tasks, due_tasks, gmail_client = await asyncio.gather(
+            timer.run("weather", get_next_24hr_weather_forecast),
+            timer.run("routines", gather_all_routine_information),
+            timer.run("notion tasks", lambda: get_notion_client().get_pending_tasks()),
+            # Overdue and due-today tasks (an indexed query when the mirror is on)
+            timer.run(
+                "due tasks",
+                lambda: get_notion_client().get_pending_tasks(due_before=local_today),
+            ),
+            timer.run("gmail auth", get_gmail_client),
+        )
 
-    # 4. Generate Message with OpenAI
+    # 2. Generate Message with OpenAI
     today = get_local_now().strftime("%Y-%m-%d, %A")
 
     system_prompt = (
@@ -106,11 +117,14 @@ Weather Forecast:
 {weather_info}
 
 Routine for Today:
-- Supplements: {supplements}
-- Skincare: {skincare}
-- Workout: {workouts}
+- Supplements: {routines["supplements"]}
+- Skincare: {routines["skincare"]}
+- Workout: {routines["workouts"]}
+
+Overdue or Due Today:
+{due_tasks}
 
-Pending Notion Tasks:
+All Pending Notion Tasks:
 {tasks}
 """
 
@@ -119,31 +133,39 @@ Pending Notion Tasks:
         {"role": "user", "content": user_data},
     ]
 
-    response = openai_client.client.chat.completions.create(
-        model=openai_client.model,
-        messages=messages,
-    )
-
+    response = await timer.run("llm", get_openai_client().chat, messages)
     note_content = response.choices[0].message.content
 
-    # 5. Send Email
+    # 3. Send email and Discord message in parallel
     subject = f"Junes' note for {today}"
-    gmail_client.send_email(to=recipient_email, subject=subject, content=note_content)
-
-    print(f"Morning routine email sent to {recipient_email}.")
+    deliveries = [
+        timer.run(
+            "email", deliver_email, gmail_client, recipient_email, subject, note_content
+        )
+    ]
 
-    # 6. Send Discord Message
     discord_token = os.getenv("DISCORD_BOT_TOKEN")
     discord_user_id = os.getenv("DISCORD_AUTHORIZED_USER_ID")
     if discord_token and discord_user_id:
-        import asyncio
-
-        asyncio.run(send_discord_message(discord_token, discord_user_id, note_content))
+        deliveries.append(
+            timer.run("discord", send_discord_message, discord_user_id, note_content)
+        )
     else:
         print(
             "Skipping Discord message: DISCORD_BOT_TOKEN or DISCORD_AUTHORIZED_USER_ID not set."
         )
 
+    with timer.stage("delivery (total)"):
+        await asyncio.gather(*deliveries)
+
+    timer.report()
+
+
+def main():
+    # Load environment variables from the root directory
+    load_dotenv(dotenv_path=root_dir / ".env")
+    asyncio.run(run_morning_routine())
+
 
 if __name__ == "__main__":
     main()
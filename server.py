@@ -1,4 +1,5 @@
 import os
+import io
 import asyncio
 import discord
 from discord.ext import commands
@@ -7,10 +8,13 @@ import json
 from dotenv import load_dotenv
 
 # Import existing clients and skills
-from apis.openai_api import OpenAIClient
+from apis import rate_limit
+from apis.registry import get_async_openai_client
 import skills
 from skills.rag import ToolsRAG
 from skills.utils import get_local_now
+from tools.discord_stream import SpeechReply, StreamingReply
+from tools.message_dispatcher import MessageDispatcher
 
 # Load environment variables
 load_dotenv()
@@ -24,9 +28,16 @@ logging.basicConfig(
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 AUTHORIZED_USER_IDS = os.getenv("DISCORD_AUTHORIZED_USER_ID", "").split(",")
 AUTHORIZED_USER_IDS = [int(i.strip()) for i in AUTHORIZED_USER_IDS if i.strip()]
-
-# Initialize OpenAI Client
-openai_client = OpenAIClient()
+MAX_CONCURRENT_USERS = int(os.getenv("DISCORD_MAX_CONCURRENT_USERS", "4"))
+MAX_QUEUE_DEPTH = int(os.getenv("DISCORD_MAX_QUEUE_DEPTH", "5"))
+STREAM_RESPONSES = os.getenv("DISCORD_STREAM_RESPONSES", "true").lower() == "true"
+STREAM_EDIT_INTERVAL = float(os.getenv("DISCORD_STREAM_EDIT_INTERVAL", "1.0"))
+VOICE_CHUNKED = os.getenv("DISCORD_VOICE_CHUNKED", "false").lower() == "true"
+# Earlier user turns considered alongside the current message when retrieving tools
+TOOL_CONTEXT_TURNS = int(os.getenv("TOOLS_RAG_CONTEXT_TURNS", "2"))
+
+# Initialize OpenAI Client (async, so LLM round-trips don't block the event loop)
+openai_client = get_async_openai_client()
 tools_rag = ToolsRAG()
 
 
@@ -112,6 +123,12 @@ def truncate_history(history, max_messages=21):
     return [system_message] + recent_messages
 
 
+def recent_user_messages(history, turns=TOOL_CONTEXT_TURNS):
+    """Returns the latest user messages, newest first, for tool retrieval."""
+    messages = [m["content"] for m in reversed(history) if m.get("role") == "user"]
+    return messages[: turns + 1]
+
+
 # Voice mode state: {user_id: bool}
 voice_modes = {}
 
@@ -134,7 +151,8 @@ async def handle_tool_call(name, arguments, user_id=None):
             if asyncio.iscoroutinefunction(skill_func):
                 result = await skill_func(**arguments)
             else:
-                result = skill_func(**arguments)
+                # Run blocking skills in a worker thread to keep the event loop free
+                result = await asyncio.to_thread(skill_func, **arguments)
 
             # Special handling for server-side state
             if name == "toggle_voice_mode" and user_id is not None:
@@ -148,6 +166,90 @@ async def handle_tool_call(name, arguments, user_id=None):
         return f"Error: Unknown tool {name}"
 
 
+async def stream_chat(messages, reply, **kwargs):
+    """Streams a chat completion into a reply (StreamingReply or SpeechReply).
+
+    Returns the response text and its tool calls in history format.
+    """
+    tool_calls = {}
+
+    try:
+        stream = await openai_client.chat(messages, stream=True, **kwargs)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                await reply.append(delta.content)
+
+            # Tool calls arrive in fragments keyed by index; stitch them back together
+            for tc in delta.tool_calls or []:
+                entry = tool_calls.setdefault(
+                    tc.index,
+                    {"id": None, "type": "function", "function": {"name": "", "arguments": ""}},
+                )
+                if tc.id:
+                    entry["id"] = tc.id
+                if tc.function and tc.function.name:
+                    entry["function"]["name"] += tc.function.name
+                if tc.function and tc.function.arguments:
+                    entry["function"]["arguments"] += tc.function.arguments
+
+        await reply.finish()
+    except BaseException:
+        # Don't leave voice clips posting after the error message
+        await reply.cancel()
+        raise
+
+    return reply.text or None, [tool_calls[i] for i in sorted(tool_calls)]
+
+
+async def complete_chat(messages, reply=None, **kwargs):
+    """Gets a chat completion, returning its text and tool calls in history format.
+
+    If a reply is given, the completion is streamed into it as it is generated.
+    """
+    if reply is not None:
+        return await stream_chat(messages, reply, **kwargs)
+
+    response = await openai_client.chat(messages, **kwargs)
+    response_message = response.choices[0].message
+    tool_calls = [
+        {
+            "id": tc.id,
+            "type": tc.type,
+            "function": {
+                "name": tc.function.name,
+                "arguments": tc.function.arguments,
+            },
+        }
+        for tc in response_message.tool_calls or []
+    ]
+    return response_message.content, tool_calls
+
+
+async def synthesize_speech(text: str) -> bytes:
+    return await openai_client.generate_speech(text, response_format="mp3")
+
+
+def create_streaming_reply(message, user_id):
+    """Returns the reply to stream the next completion into, or None to send it whole."""
+    if voice_modes.get(user_id, False):
+        if VOICE_CHUNKED:
+            return SpeechReply(message.channel, synthesize_speech)
+        return None
+    if STREAM_RESPONSES:
+        return StreamingReply(message.channel, edit_interval=STREAM_EDIT_INTERVAL)
+    return None
+
+
+async def send_voice_reply(message, text: str):
+    audio = await synthesize_speech(text)
+    await message.channel.send(
+        file=discord.File(io.BytesIO(audio), filename="response.mp3")
+    )
+
+
 async def process_response(message, user_text: str):
     refresh_config_if_needed()
     user_id = message.author.id
@@ -169,96 +271,56 @@ async def process_response(message, user_text: str):
     try:
         async with message.channel.typing():
             # Call OpenAI
-            response = openai_client.client.chat.completions.create(
-                model=openai_client.model,
-                messages=conversation_history[user_id],
-                tools=tools_rag.retrieve_tools_from_description(user_text),
+            reply = create_streaming_reply(message, user_id)
+            final_text, tool_calls = await complete_chat(
+                conversation_history[user_id],
+                reply,
+                tools=await tools_rag.aretrieve_tools(
+                    recent_user_messages(conversation_history[user_id])
+                ),
                 tool_choice="auto",
             )
 
-            response_message = response.choices[0].message
-
             # Handle tool calls
-            if response_message.tool_calls:
-                # Convert to dict for consistent history storage
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": response_message.content,
-                    "tool_calls": [
-                        {
-                            "id": tc.id,
-                            "type": tc.type,
-                            "function": {
-                                "name": tc.function.name,
-                                "arguments": tc.function.arguments,
-                            },
-                        }
-                        for tc in response_message.tool_calls
-                    ],
-                }
-                conversation_history[user_id].append(assistant_msg)
-
-                for tool_call in response_message.tool_calls:
-                    function_name = tool_call.function.name
-                    function_args = json.loads(tool_call.function.arguments)
+            if tool_calls:
+                conversation_history[user_id].append(
+                    {"role": "assistant", "content": final_text, "tool_calls": tool_calls}
+                )
 
-                    result = await handle_tool_call(
-                        function_name, function_args, user_id=user_id
+                # Tool calls in one turn are independent, so run them concurrently
+                results = await asyncio.gather(
+                    *(
+                        handle_tool_call(
+                            tool_call["function"]["name"],
+                            json.loads(tool_call["function"]["arguments"]),
+                            user_id=user_id,
+                        )
+                        for tool_call in tool_calls
                     )
+                )
 
+                # gather preserves order, so results line up with their tool_call_ids
+                for tool_call, result in zip(tool_calls, results):
                     conversation_history[user_id].append(
                         {
-                            "tool_call_id": tool_call.id,
+                            "tool_call_id": tool_call["id"],
                             "role": "tool",
-                            "name": function_name,
+                            "name": tool_call["function"]["name"],
                             "content": str(result),
                         }
                     )
 
-                # Get final response after tool execution
-                second_response = openai_client.client.chat.completions.create(
-                    model=openai_client.model,
-                    messages=conversation_history[user_id],
-                )
-                final_text = second_response.choices[0].message.content
-                conversation_history[user_id].append(
-                    {"role": "assistant", "content": final_text}
-                )
+                # Get final response after tool execution (a tool may have toggled voice mode)
+                reply = create_streaming_reply(message, user_id)
+                final_text, _ = await complete_chat(conversation_history[user_id], reply)
 
-                if voice_modes.get(user_id, False):
-                    audio_path = f"response_{user_id}.mp3"
-                    try:
-                        await asyncio.to_thread(
-                            openai_client.generate_speech,
-                            final_text,
-                            audio_path,
-                            response_format="mp3",
-                        )
-                        await message.channel.send(file=discord.File(audio_path))
-                    finally:
-                        if os.path.exists(audio_path):
-                            os.remove(audio_path)
-                else:
-                    await message.channel.send(final_text)
-            else:
-                final_text = response_message.content
-                conversation_history[user_id].append(
-                    {"role": "assistant", "content": final_text}
-                )
+            conversation_history[user_id].append(
+                {"role": "assistant", "content": final_text}
+            )
 
+            if reply is None:
                 if voice_modes.get(user_id, False):
-                    audio_path = f"response_{user_id}.mp3"
-                    try:
-                        await asyncio.to_thread(
-                            openai_client.generate_speech,
-                            final_text,
-                            audio_path,
-                            response_format="mp3",
-                        )
-                        await message.channel.send(file=discord.File(audio_path))
-                    finally:
-                        if os.path.exists(audio_path):
-                            os.remove(audio_path)
+                    await send_voice_reply(message, final_text)
                 else:
                     await message.channel.send(final_text)
 
@@ -278,6 +340,25 @@ async def on_message(message):
     if message.author == bot.user:
         return
 
+    if message.content.strip() == "!stats" and (
+        not AUTHORIZED_USER_IDS or message.author.id in AUTHORIZED_USER_IDS
+    ):
+        stats = {
+            "queue": dispatcher.stats(),
+            "tool_retrieval": tools_rag.stats(),
+            "upstreams": rate_limit.stats(),
+        }
+        await message.channel.send(f"```{json.dumps(stats, indent=2)}```")
+        return
+
+    # Queue per user so a user's turns run in order and never interleave history
+    if not dispatcher.submit(message.author.id, message):
+        await message.channel.send(
+            "I'm still working through your earlier messages, give me a moment!"
+        )
+
+
+async def handle_message(message):
     # Handle text messages
     if message.content:
         await process_response(message, message.content)
@@ -290,11 +371,11 @@ async def on_message(message):
                 or attachment.filename.endswith((".mp3", ".wav", ".ogg", ".m4a"))
             ):
                 async with message.channel.typing():
-                    temp_file = f"temp_{attachment.filename}"
+                    temp_file = f"temp_{message.id}_{attachment.filename}"
                     await attachment.save(temp_file)
                     try:
                         # Transcribe audio
-                        transcription = openai_client.transcribe_audio(temp_file)
+                        transcription = await openai_client.transcribe_audio(temp_file)
                         logging.info(f"Transcription: {transcription}")
                         # Process as text
                         await process_response(message, transcription)
@@ -304,6 +385,13 @@ async def on_message(message):
                 break  # Only process one audio file per message
 
 
+dispatcher = MessageDispatcher(
+    handle_message,
+    max_concurrent_users=MAX_CONCURRENT_USERS,
+    max_queue_depth=MAX_QUEUE_DEPTH,
+)
+
+
 if __name__ == "__main__":
     if not DISCORD_BOT_TOKEN:
         print("Error: DISCORD_BOT_TOKEN not found in environment.")
@@ -1,10 +1,12 @@
 from .notion_skills import (
     record_and_add_task,
     add_new_task,
+    add_tasks,
     get_pending_tasks,
     mark_task_as_done,
+    mark_tasks_done,
 )
-from .email_skills import aggregate_and_email_tasks
+from .email_skills import aggregate_and_email_tasks, get_email_delivery_status
 from .system_skills import shutdown_agent, toggle_voice_mode
 from .utils import get_current_time, get_next_24hr_weather_forecast
 from blueprint_routine.blueprint_skills import gather_routine_information
@@ -12,9 +14,12 @@ from blueprint_routine.blueprint_skills import gather_routine_information
 # Global mapping of skill name to function
 SKILLS_MAP = {
     "add_new_task": add_new_task,
+    "add_tasks": add_tasks,
     "get_pending_tasks": get_pending_tasks,
     "mark_task_as_done": mark_task_as_done,
+    "mark_tasks_done": mark_tasks_done,
     "aggregate_and_email_tasks": aggregate_and_email_tasks,
+    "get_email_delivery_status": get_email_delivery_status,
     "shutdown_agent": shutdown_agent,
     "toggle_voice_mode": toggle_voice_mode,
     "get_current_time": get_current_time,
@@ -25,9 +30,12 @@ SKILLS_MAP = {
 
 __all__ = [
     "add_new_task",
+    "add_tasks",
     "get_pending_tasks",
     "mark_task_as_done",
+    "mark_tasks_done",
     "aggregate_and_email_tasks",
+    "get_email_delivery_status",
     "shutdown_agent",
     "toggle_voice_mode",
     "get_current_time",
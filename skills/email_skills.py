@@ -1,16 +1,13 @@
 import os
-from apis.gmail_api import GmailClient
-from apis.notion_api import NotionClient
+from apis.registry import get_gmail_client, get_notion_client, get_openai_client
 from tools.task_aggregator import TaskAggregator
 
 
 def aggregate_and_email_tasks():
     """Fetches pending tasks from Notion, summarizes them, and emails the report."""
-    from apis.openai_api import OpenAIClient
-
-    openai_client = OpenAIClient()
-    notion_client = NotionClient()
-    gmail_client = GmailClient()
+    openai_client = get_openai_client()
+    notion_client = get_notion_client()
+    gmail_client = get_gmail_client()
 
     print("\n--- Daily Task Aggregation ---")
     try:
@@ -24,11 +21,26 @@ def aggregate_and_email_tasks():
 
         recipient = os.getenv("REPORT_RECIPIENT_EMAIL")
         if recipient:
-            aggregator.email_report(recipient, report)
-            return f"Daily summary sent to {recipient}."
+            delivery_ids = aggregator.email_report(recipient, report)
+            return (
+                f"Daily summary queued for {recipient}. "
+                f"Delivery id(s): {', '.join(delivery_ids)}"
+            )
         else:
             print("\nError: REPORT_RECIPIENT_EMAIL not set in .env")
             return "Error: REPORT_RECIPIENT_EMAIL not set in .env"
     except Exception as e:
         print(f"Error in task aggregation/emailing: {e}")
         return f"Error in task aggregation/emailing: {str(e)}"
+
+
+def get_email_delivery_status(delivery_id: str):
+    """Looks up the delivery status of a queued email."""
+    try:
+        status = get_gmail_client().delivery_status(delivery_id)
+        if status is None:
+            return f"No email found with delivery id {delivery_id}."
+        return status
+    except Exception as e:
+        print(f"Error checking email delivery status: {e}")
+        return f"Error checking email delivery status: {str(e)}"
@@ -0,0 +1,132 @@
+import atexit
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from apis.openai_api import embedding_model_id
+
+
+class EmbeddingCache:
+    """LRU cache of text embeddings with size and age eviction.
+
+    Keys are normalized (case and whitespace insensitive) so trivially different
+    phrasings of the same short command share an entry. If `persist_path` is set,
+    the cache is loaded from and periodically saved to a local .npz file.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_age_seconds: float = 7 * 24 * 3600,
+        persist_path: str = None,
+        model: str = None,
+        save_interval_seconds: float = 30,
+    ):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.persist_path = persist_path
+        self.model = model or embedding_model_id()
+        self.save_interval_seconds = save_interval_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+        self._entries: OrderedDict[str, tuple[np.ndarray, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+
+        if self.persist_path:
+            self._load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] > self.max_age_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text: str, embedding: np.ndarray, elapsed_seconds: float = 0.0):
+        """Stores an embedding. elapsed_seconds is how long the miss took to fetch."""
+        key = self.normalize(text)
+        with self._lock:
+            self.miss_seconds += elapsed_seconds
+            self._entries[key] = (embedding, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+        if self.persist_path and time.time() - self._last_save > self.save_interval_seconds:
+            self.save()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and an estimate of the latency saved by hits."""
+        lookups = self.hits + self.misses
+        avg_miss_seconds = self.miss_seconds / self.misses if self.misses else 0.0
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_miss_seconds": avg_miss_seconds,
+            "estimated_seconds_saved": self.hits * avg_miss_seconds,
+        }
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            keys = list(self._entries)
+            vectors = np.array([self._entries[k][0] for k in keys])
+            timestamps = np.array([self._entries[k][1] for k in keys])
+            self._dirty = False
+            self._last_save = time.time()
+
+        # Write to a temp file first so a crash mid-save can't corrupt the cache
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            keys=np.array(keys, dtype=str),
+            vectors=vectors,
+            timestamps=timestamps,
+            model=np.array(self.model),
+        )
+        os.replace(tmp_path, self.persist_path)
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            data = np.load(self.persist_path)
+            if str(data["model"]) != self.model:
+                print("Embedding model changed, discarding persisted embedding cache.")
+                return
+            now = time.time()
+            for key, vector, timestamp in zip(
+                data["keys"], data["vectors"], data["timestamps"]
+            ):
+                if now - timestamp <= self.max_age_seconds:
+                    self._entries[str(key)] = (vector, float(timestamp))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            print(f"Error loading embedding cache {self.persist_path}: {e}")
@@ -0,0 +1,82 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from",
+    "i", "if", "in", "is", "it", "me", "my", "of", "on", "or", "should", "so",
+    "that", "the", "this", "to", "use", "what", "with", "you", "your",
+}
+
+
+def stem(token: str) -> str:
+    """Strips common suffixes so inflections of a word meet at the same stem.
+
+    e.g. update/updates/updated/updating -> "updat", status/statuses -> "status".
+    """
+    if token.endswith("ing") and len(token) > 5:
+        token = token[:-3]
+    elif token.endswith("ed") and len(token) > 4:
+        token = token[:-2]
+    elif token.endswith("es") and len(token) > 4 and token[:-2].endswith(
+        ("s", "x", "ch", "sh")
+    ):
+        token = token[:-2]
+    elif token.endswith("s") and len(token) > 3 and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    # Dropping a final "e" makes "note"/"notes" and "schedule"/"scheduled" agree
+    if token.endswith("e") and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases, splits on non-alphanumerics, drops stopwords and stems."""
+    return [
+        stem(token)
+        for token in re.findall(r"[a-z0-9]+", text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def tool_document(tool: dict) -> str:
+    """Flattens a tools.json entry (name, description, parameters) into searchable text."""
+    parts = [tool["name"].replace("_", " "), tool["description"]]
+    for name, spec in tool.get("parameters", {}).get("properties", {}).items():
+        parts.append(name.replace("_", " "))
+        parts.append(spec.get("description", ""))
+        parts.extend(str(v) for v in spec.get("enum", []))
+    return " ".join(parts)
+
+
+class LexicalToolIndex:
+    """BM25 index over tool documents, scored locally without any network calls."""
+
+    def __init__(self, documents: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = [Counter(tokenize(doc)) for doc in documents]
+        self.doc_lengths = np.array([sum(c.values()) for c in self.doc_terms], dtype=float)
+        self.avg_length = self.doc_lengths.mean() if len(documents) else 0.0
+
+        n_docs = len(documents)
+        doc_freq = Counter(term for terms in self.doc_terms for term in terms)
+        self.idf = {
+            term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.doc_terms))
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, terms in enumerate(self.doc_terms):
+                tf = terms.get(term, 0)
+                if tf:
+                    norm = 1 - self.b + self.b * self.doc_lengths[i] / self.avg_length
+                    scores[i] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
@@ -1,17 +1,15 @@
 import os
 from datetime import datetime
-from apis.notion_api import NotionClient
+from apis.registry import get_notion_client, get_openai_client
 from tools.recorder import AudioRecorder
 from models.task import NotionTask
 
 
 def record_and_add_task():
     """Records audio, transcribes it, extracts a task, and adds it to Notion."""
-    from apis.openai_api import OpenAIClient
-
     recorder = AudioRecorder()
-    openai_client = OpenAIClient()
-    notion_client = NotionClient()
+    openai_client = get_openai_client()
+    notion_client = get_notion_client()
 
     print("--- New Task Recording ---")
     try:
@@ -37,23 +35,13 @@ def add_new_task(
     description: str = None,
 ):
     """Directly adds a new task to Notion. Useful for agents that have already parsed the user's intent."""
-    notion_client = NotionClient()
+    notion_client = get_notion_client()
 
     print(f"\n--- Adding New Task: {task_name} ---")
     if description:
         print(f"Description: {description}")
     try:
-        parsed_due_date = None
-        if due_date:
-            parsed_due_date = datetime.strptime(due_date, "%Y-%m-%d").date()
-
-        task = NotionTask(
-            task_name=task_name,
-            status=status,
-            task_types=task_types or ["Misc"],
-            due_date=parsed_due_date,
-            description=description,
-        )
+        task = _build_task(task_name, status, task_types, due_date, description)
         notion_client.add_task(task)
         print("Task added to Notion.")
         return f"Successfully added task: {task_name}"
@@ -62,12 +50,59 @@ def add_new_task(
         return f"Error adding task: {str(e)}"
 
 
-def get_pending_tasks():
-    """Fetches all tasks that are not 'Done' from Notion."""
-    notion_client = NotionClient()
+def add_tasks(tasks: list):
+    """Adds several tasks to Notion in one call. Each task takes add_new_task's arguments."""
+    notion_client = get_notion_client()
+    print(f"\n--- Adding {len(tasks)} Tasks ---")
+
+    results = [None] * len(tasks)
+    built = []
+    for i, task in enumerate(tasks):
+        try:
+            built.append((i, _build_task(**task)))
+        except Exception as e:
+            results[i] = f"Error adding task {task.get('task_name')}: {str(e)}"
+
+    outcomes = notion_client.add_tasks([task for _, task in built])
+    for (i, task), outcome in zip(built, outcomes):
+        if isinstance(outcome, Exception):
+            results[i] = f"Error adding task {task.task_name}: {str(outcome)}"
+        else:
+            results[i] = f"Successfully added task: {task.task_name}"
+
+    added = sum(r.startswith("Successfully") for r in results)
+    print(f"Added {added} of {len(tasks)} tasks to Notion.")
+    return results
+
+
+def _build_task(
+    task_name: str,
+    status: str = "Not started",
+    task_types: list = None,
+    due_date: str = None,
+    description: str = None,
+) -> NotionTask:
+    parsed_due_date = None
+    if due_date:
+        parsed_due_date = datetime.strptime(due_date, "%Y-%m-%d").date()
+
+    return NotionTask(
+        task_name=task_name,
+        status=status,
+        task_types=task_types or ["Misc"],
+        due_date=parsed_due_date,
+        description=description,
+    )
+
+
+def get_pending_tasks(due_before: str = None, task_type: str = None):
+    """Fetches tasks that are not 'Done' from Notion, optionally by due date or type."""
+    notion_client = get_notion_client()
     print("\n--- Fetching Pending Tasks ---")
     try:
-        tasks = notion_client.get_pending_tasks()
+        tasks = notion_client.get_pending_tasks(
+            due_before=due_before, task_type=task_type
+        )
         print(f"Found {len(tasks)} pending tasks.")
         return tasks
     except Exception as e:
@@ -77,7 +112,7 @@ def get_pending_tasks():
 
 def mark_task_as_done(page_id: str, task_name: str = None):
     """Marks a task as 'Done' in Notion using its page ID."""
-    notion_client = NotionClient()
+    notion_client = get_notion_client()
     print(f"\n--- Marking Task as Done: {task_name or page_id} ---")
     try:
         notion_client.update_task_status(page_id, "Done")
@@ -87,3 +122,24 @@ def mark_task_as_done(page_id: str, task_name: str = None):
     except Exception as e:
         print(f"Error marking task as done: {e}")
         return f"Error marking task as done: {str(e)}"
+
+
+def mark_tasks_done(tasks: list):
+    """Marks several tasks as 'Done' in one call. Each task has a page_id and optional task_name."""
+    notion_client = get_notion_client()
+    print(f"\n--- Marking {len(tasks)} Tasks as Done ---")
+
+    outcomes = notion_client.update_task_statuses([t["page_id"] for t in tasks], "Done")
+    results = []
+    for task, outcome in zip(tasks, outcomes):
+        name_display = (
+            f"'{task['task_name']}'" if task.get("task_name") else f"ID: {task['page_id']}"
+        )
+        if isinstance(outcome, Exception):
+            results.append(f"Error marking {name_display} as done: {str(outcome)}")
+        else:
+            results.append(f"Successfully marked {name_display} as Done.")
+
+    done = sum(r.startswith("Successfully") for r in results)
+    print(f"Marked {done} of {len(tasks)} tasks as Done.")
+    return results
@@ -1,39 +1,270 @@
 import json
 import os
+import time
 
 import numpy as np
 from dotenv import load_dotenv
 
-from apis.openai_api import OpenAIClient
+from apis.openai_api import AsyncOpenAIClient, OpenAIClient
+from apis.registry import get_async_openai_client, get_openai_client
+from skills.embedding_cache import EmbeddingCache
+from skills.lexical_index import LexicalToolIndex, tool_document
+from skills.tool_vectors import ToolVectorStore
 
 load_dotenv()
 
 
+BACKENDS = ["embedding", "lexical", "hybrid"]
+
+
 class ToolsRAG:
+    """Picks the tools most relevant to a user message.
+
+    Backends:
+    - "embedding": cosine similarity against remote OpenAI embeddings.
+    - "lexical": local BM25 over tool names/descriptions, no network calls.
+    - "hybrid": lexical when it is confident, embeddings otherwise.
+    """
+
+    # Lexical scores aren't comparable to cosine similarities; any term overlap counts
+    LEXICAL_THRESHOLD = 0.0
+
     tool_vectors: np.ndarray
     tools: list[dict]
+    lexical_index: LexicalToolIndex
 
     tools_file_path: str
     vectors_file_path: str
     client: OpenAIClient
+    async_client: AsyncOpenAIClient
+    query_cache: EmbeddingCache
+    vector_store: ToolVectorStore
 
     def __init__(
         self,
         tools_file_path: str = "tools.json",
         vectors_file_path: str = "tool_vectors.npy",
+        backend: str = None,
+        min_lexical_score: float = None,
+        lexical_margin: float = None,
+        max_k: int = None,
+        threshold: float = None,
+        always_include: list[str] = None,
     ):
         self.tools_file_path = tools_file_path
         self.vectors_file_path = vectors_file_path
-        self.client = OpenAIClient()
+        self.backend = (backend or os.getenv("TOOLS_RAG_BACKEND", "embedding")).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown ToolsRAG backend {self.backend}. Choose from {', '.join(BACKENDS)}"
+            )
+        # Hybrid mode trusts the lexical ranking only if the best match scores at least
+        # min_lexical_score and beats the first excluded tool by lexical_margin times
+        self.min_lexical_score = (
+            min_lexical_score
+            if min_lexical_score is not None
+            else float(os.getenv("TOOLS_RAG_MIN_LEXICAL_SCORE", "2.0"))
+        )
+        self.lexical_margin = (
+            lexical_margin
+            if lexical_margin is not None
+            else float(os.getenv("TOOLS_RAG_LEXICAL_MARGIN", "2.0"))
+        )
+        # Settings for retrieve_tools: variable-size results governed by a similarity
+        # threshold and max_k, plus tools that are always offered to the model
+        self.max_k = (
+            max_k if max_k is not None else int(os.getenv("TOOLS_RAG_MAX_K", "5"))
+        )
+        self.min_k = 1
+        self.threshold = (
+            threshold
+            if threshold is not None
+            else float(os.getenv("TOOLS_RAG_THRESHOLD", "0.2"))
+        )
+        self.always_include = (
+            always_include
+            if always_include is not None
+            else [
+                name.strip()
+                for name in os.getenv("TOOLS_RAG_ALWAYS_INCLUDE", "").split(",")
+                if name.strip()
+            ]
+        )
+        self.context_decay = float(os.getenv("TOOLS_RAG_CONTEXT_DECAY", "0.8"))
+        self.local_retrievals = 0
+        self.remote_retrievals = 0
+        self.client = get_openai_client()
+        self.async_client = get_async_openai_client()
+        self.vector_store = ToolVectorStore(vectors_file_path, self.client)
+        self.query_cache = EmbeddingCache(
+            max_entries=int(os.getenv("TOOLS_RAG_CACHE_SIZE", "256")),
+            max_age_seconds=float(os.getenv("TOOLS_RAG_CACHE_TTL", str(7 * 24 * 3600))),
+            persist_path=os.getenv("TOOLS_RAG_CACHE_PATH") or None,
+        )
 
         self.load_tools_and_vectors()
 
     def retrieve_tools_from_description(self, description: str, k: int = 5):
-        embedding = self.client.embed_text(description)[0]
-        similarities = np.dot(self.tool_vectors, embedding)
+        similarities = self._local_similarities([description], k)
+        if similarities is None:
+            similarities = self._merge_similarities(self._embed_queries([description]))
+        return self._top_k_tools(similarities, k)
+
+    async def aretrieve_tools_from_description(self, description: str, k: int = 5):
+        """Same as retrieve_tools_from_description, without blocking the event loop."""
+        similarities = self._local_similarities([description], k)
+        if similarities is None:
+            embeddings = await self._aembed_queries([description])
+            similarities = self._merge_similarities(embeddings)
+        return self._top_k_tools(similarities, k)
+
+    def retrieve_tools(
+        self, queries: list[str], max_k: int = None, threshold: float = None
+    ) -> list[dict]:
+        """Retrieves tools relevant to any of several queries, embedded in one request.
+
+        queries[0] is the current message; later entries (e.g. earlier turns) are
+        down-weighted by context_decay per position. Returns the always-included
+        tools plus up to max_k tools whose merged similarity exceeds threshold.
+        """
+        queries = [q for q in queries if q and q.strip()]
+        if not queries:
+            # e.g. a silent voice note; there is nothing to rank tools against
+            return self._always_included_tools()
+        max_k = max_k if max_k is not None else self.max_k
+        similarities = self._local_similarities(queries, max_k)
+        if similarities is None:
+            similarities = self._merge_similarities(self._embed_queries(queries))
+            return self._select_tools(
+                similarities,
+                max_k,
+                threshold if threshold is not None else self.threshold,
+            )
+        return self._select_tools(similarities, max_k, self.LEXICAL_THRESHOLD)
+
+    async def aretrieve_tools(
+        self, queries: list[str], max_k: int = None, threshold: float = None
+    ) -> list[dict]:
+        """Same as retrieve_tools, without blocking the event loop."""
+        queries = [q for q in queries if q and q.strip()]
+        if not queries:
+            return self._always_included_tools()
+        max_k = max_k if max_k is not None else self.max_k
+        similarities = self._local_similarities(queries, max_k)
+        if similarities is None:
+            embeddings = await self._aembed_queries(queries)
+            similarities = self._merge_similarities(embeddings)
+            return self._select_tools(
+                similarities,
+                max_k,
+                threshold if threshold is not None else self.threshold,
+            )
+        return self._select_tools(similarities, max_k, self.LEXICAL_THRESHOLD)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "local_retrievals": self.local_retrievals,
+            "remote_retrievals": self.remote_retrievals,
+            "embedding_cache": self.query_cache.stats(),
+        }
+
+    def _embed_queries(self, queries: list[str]) -> list[np.ndarray]:
+        embeddings = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+        if missing:
+            start = time.perf_counter()
+            new_embeddings = self.client.embed_text([queries[i] for i in missing])
+            self._cache_embeddings(
+                queries, embeddings, missing, new_embeddings, time.perf_counter() - start
+            )
+        return embeddings
+
+    async def _aembed_queries(self, queries: list[str]) -> list[np.ndarray]:
+        embeddings = [self.query_cache.get(q) for q in queries]
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+        if missing:
+            start = time.perf_counter()
+            new_embeddings = await self.async_client.embed_text(
+                [queries[i] for i in missing]
+            )
+            self._cache_embeddings(
+                queries, embeddings, missing, new_embeddings, time.perf_counter() - start
+            )
+        return embeddings
+
+    def _cache_embeddings(self, queries, embeddings, missing, new_embeddings, elapsed):
+        # One request served every miss, so split its latency between them
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = embedding
+            self.query_cache.put(queries[i], embedding, elapsed / len(missing))
+
+    def _query_weights(self, n: int) -> np.ndarray:
+        return self.context_decay ** np.arange(n)
+
+    def _merge_similarities(self, embeddings: list[np.ndarray]) -> np.ndarray:
+        """Scores each tool by its best weighted similarity across the queries."""
+        similarities = np.array([self.vector_store.similarities(e) for e in embeddings])
+        return (similarities * self._query_weights(len(embeddings))[:, None]).max(axis=0)
+
+    def _local_similarities(self, queries: list[str], k: int) -> np.ndarray | None:
+        """Returns lexical scores if the backend allows answering locally, else None."""
+        if self.backend == "embedding":
+            self.remote_retrievals += 1
+            return None
 
-        top_k_indices = np.argsort(similarities)[-k:][::-1]
-        return [self.tools[i] for i in top_k_indices]
+        scores = np.array([self.lexical_index.score(q) for q in queries])
+        scores = (scores * self._query_weights(len(queries))[:, None]).max(axis=0)
+        if self.backend == "lexical" or self._is_confident(scores, k):
+            self.local_retrievals += 1
+            return scores
+
+        self.remote_retrievals += 1
+        return None
+
+    def _is_confident(self, scores: np.ndarray, k: int) -> bool:
+        ranked = np.sort(scores)[::-1]
+        best = ranked[0] if len(ranked) else 0.0
+        first_excluded = ranked[k] if len(ranked) > k else 0.0
+        return best >= self.min_lexical_score and best >= self.lexical_margin * first_excluded
+
+    def _top_k_indices(self, similarities: np.ndarray, k: int) -> np.ndarray:
+        # Partial selection is O(n); only the k winners need a full sort
+        k = min(k, len(similarities))
+        if k <= 0:
+            return np.array([], dtype=int)
+        top_k_indices = np.argpartition(similarities, -k)[-k:]
+        return top_k_indices[np.argsort(similarities[top_k_indices])[::-1]]
+
+    def _top_k_tools(self, similarities: np.ndarray, k: int) -> list[dict]:
+        return [self.tools[i] for i in self._top_k_indices(similarities, k)]
+
+    def _select_tools(
+        self, similarities: np.ndarray, max_k: int, threshold: float
+    ) -> list[dict]:
+        ranked = self._top_k_indices(similarities, max_k)
+        selected = [i for i in ranked if similarities[i] > threshold]
+        if not selected:
+            # Never leave the model with no candidate tools at all. With no signal
+            # (e.g. no word shared with any tool) the top pick is arbitrary, so
+            # offer the full max_k rather than one meaningless tool.
+            has_signal = len(ranked) and similarities[ranked[0]] > 0
+            selected = list(ranked[: self.min_k] if has_signal else ranked)
+
+        always = self._always_included_indices()
+        return [self.tools[i] for i in always] + [
+            self.tools[i] for i in selected if i not in always
+        ]
+
+    def _always_included_indices(self) -> list[int]:
+        return [
+            i
+            for i, t in enumerate(self.tools)
+            if t["function"]["name"] in self.always_include
+        ]
+
+    def _always_included_tools(self) -> list[dict]:
+        return [self.tools[i] for i in self._always_included_indices()]
 
     def load_tools_and_vectors(self) -> None:
         if not os.path.exists(self.tools_file_path):
@@ -52,17 +283,30 @@ class ToolsRAG:
             }
             for t in descriptions
         ]
+        self.lexical_index = LexicalToolIndex([tool_document(t) for t in descriptions])
 
-        if os.path.exists(self.vectors_file_path):
-            self.tool_vectors = np.load(self.vectors_file_path)
+        # The lexical backend never needs embeddings
+        if self.backend == "lexical":
             return
 
-        print("Cannot find tool vectors file, generating new vectors...")
-        with open(self.tools_file_path, "r") as f:
-            tools_descriptions = json.load(f)
-        tools_descriptions = [
-            f"{t['name']} - {t['description']}" for t in tools_descriptions
-        ]
+        self.tool_vectors = self.vector_store.sync(descriptions)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Prebuild tool_vectors.npy so bot startup never waits on embeddings."
+    )
+    parser.add_argument("--tools", default="tools.json")
+    parser.add_argument("--vectors", default="tool_vectors.npy")
+    parser.add_argument(
+        "--force", action="store_true", help="Re-embed every tool, not just changed ones."
+    )
+    args = parser.parse_args()
 
-        self.tool_vectors = self.client.embed_text(tools_descriptions)
-        np.save(self.vectors_file_path, self.tool_vectors)
+    with open(args.tools, "r") as f:
+        tools = json.load(f)
+    store = ToolVectorStore(args.vectors, get_openai_client())
+    vectors = store.sync(tools, force=args.force)
+    print(f"{len(vectors)} tool vectors up to date in {args.vectors}.")
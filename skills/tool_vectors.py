@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from apis.openai_api import embedding_model_id
+
+STORAGE_DTYPES = ["float32", "float16", "int8"]
+
+
+class ToolVectorStore:
+    """Tool embeddings on disk, kept in sync with tools.json by content hash.
+
+    Vectors live in `vectors_file_path` (row i belongs to tool i) and a manifest
+    next to it records the hash of the text each row was embedded from. On sync,
+    only tools whose hash is new are re-embedded, in a single batched call.
+
+    Vectors can be stored as float32, float16 or int8 (with a per-row scale) and
+    are memory-mapped on load rather than read fully into RAM.
+    """
+
+    # Rows upcast to float32 at a time when scoring float16/int8 vectors
+    BLOCK_ROWS = 256
+
+    def __init__(
+        self,
+        vectors_file_path: str,
+        client,
+        model: str = None,
+        dtype: str = None,
+    ):
+        self.vectors_file_path = vectors_file_path
+        base_path = os.path.splitext(vectors_file_path)[0]
+        self.manifest_path = base_path + ".manifest.json"
+        self.scales_path = base_path + ".scales.npy"
+        self.client = client
+        self.model = model or embedding_model_id()
+        self.dtype = (dtype or os.getenv("TOOL_VECTORS_DTYPE", "float32")).lower()
+        if self.dtype not in STORAGE_DTYPES:
+            raise ValueError(
+                f"Unknown tool vector dtype {self.dtype}. Choose from {', '.join(STORAGE_DTYPES)}"
+            )
+
+        self.vectors: np.ndarray = None
+        self.scales: np.ndarray = None
+
+    @staticmethod
+    def embedding_text(tool: dict) -> str:
+        return f"{tool['name']} - {tool['description']}"
+
+    def content_hash(self, tool: dict) -> str:
+        text = f"{self.model}\n{self.embedding_text(tool)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def sync(self, tools: list[dict], force: bool = False) -> np.ndarray:
+        """Loads vectors aligned with `tools`, embedding only added or changed tools."""
+        hashes = [self.content_hash(t) for t in tools]
+        saved_hashes, saved_dtype, vectors_by_hash = (
+            ([], None, {}) if force else self._load_saved()
+        )
+
+        missing = [i for i, h in enumerate(hashes) if h not in vectors_by_hash]
+        if missing:
+            print(f"Embedding {len(missing)} new or changed tools...")
+            new_vectors = self.client.embed_text(
+                [self.embedding_text(tools[i]) for i in missing]
+            )
+            vectors_by_hash.update(zip((hashes[i] for i in missing), new_vectors))
+
+        if hashes != saved_hashes or saved_dtype != self.dtype:
+            vectors = np.array([vectors_by_hash[h] for h in hashes], dtype=np.float32)
+            self._save(tools, hashes, vectors)
+
+        self.vectors = np.load(self.vectors_file_path, mmap_mode="r")
+        self.scales = np.load(self.scales_path) if self.dtype == "int8" else None
+        return self.vectors
+
+    def similarities(self, embedding: np.ndarray) -> np.ndarray:
+        """Dot products of every stored tool vector with a query embedding, as float32."""
+        embedding = np.asarray(embedding, dtype=np.float32)
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ embedding
+
+        # float16/int8 matmuls don't go through BLAS (and float16 loses precision),
+        # so upcast a block of rows at a time and keep memory bounded
+        scores = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), self.BLOCK_ROWS):
+            block = self.vectors[start : start + self.BLOCK_ROWS]
+            scores[start : start + len(block)] = (
+                np.asarray(block, dtype=np.float32) @ embedding
+            )
+        if self.dtype == "int8":
+            scores *= self.scales
+        return scores
+
+    def _load_saved(self) -> tuple[list[str], str, dict[str, np.ndarray]]:
+        if not (
+            os.path.exists(self.vectors_file_path) and os.path.exists(self.manifest_path)
+        ):
+            return [], None, {}
+
+        with open(self.manifest_path, "r") as f:
+            manifest = json.load(f)
+        hashes = [entry["hash"] for entry in manifest["tools"]]
+        dtype = manifest.get("dtype", "float64")
+
+        vectors = np.load(self.vectors_file_path).astype(np.float32)
+        if dtype == "int8":
+            if not os.path.exists(self.scales_path):
+                return [], None, {}
+            vectors *= np.load(self.scales_path)[:, None]
+
+        if len(hashes) != len(vectors):
+            print("Tool vectors and manifest are misaligned, re-embedding all tools...")
+            return [], None, {}
+        return hashes, dtype, dict(zip(hashes, vectors))
+
+    def _save(self, tools: list[dict], hashes: list[str], vectors: np.ndarray):
+        if self.dtype == "int8":
+            # Symmetric per-row quantization: row ~= int8 row * scale
+            scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.zeros(0)
+            scales[scales == 0] = 1
+            stored = np.round(vectors / scales[:, None]).astype(np.int8)
+            np.save(self.scales_path, scales.astype(np.float32))
+        else:
+            stored = vectors.astype(self.dtype)
+
+        # Write to a temp file first so a live memory map never sees a partial file
+        tmp_path = self.vectors_file_path + ".tmp.npy"
+        np.save(tmp_path, stored)
+        os.replace(tmp_path, self.vectors_file_path)
+
+        manifest = {
+            "model": self.model,
+            "dtype": self.dtype,
+            "tools": [{"name": t["name"], "hash": h} for t, h in zip(tools, hashes)],
+        }
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
@@ -2,7 +2,8 @@ from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
 import os
-import requests
+
+from apis.registry import get_weather_provider
 
 
 def get_local_now() -> datetime:
@@ -16,19 +17,11 @@ def get_current_time() -> str:
 
 
 def get_next_24hr_weather_forecast() -> str:
-    response = requests.get(
-        "https://api.openweathermap.org/data/2.5/forecast",
-        params={
-            "q": os.environ["OPERATING_CITY"],
-            "appid": os.environ["OPENWEATHERMAP_API_KEY"],
-            "units": "imperial",
-        },
-    )
-
-    if response.status_code != 200:
+    city = os.environ["OPERATING_CITY"]
+    forecast_list = get_weather_provider().get_forecast(city, hours=24)
+    if not forecast_list:
         return "Error retrieving weather forecast."
 
-    forecast_list = response.json()["list"][:8]
     intervals = []
     for entry in forecast_list:
         timestamp = datetime.fromtimestamp(entry["dt"]).strftime("%I %p").lstrip("0")
@@ -36,7 +29,7 @@ def get_next_24hr_weather_forecast() -> str:
         desc = entry["weather"][0]["description"]
         intervals.append(f"{timestamp}: {temp}°F, {desc}")
 
-    return f"24hr weather forecast for {os.environ['OPERATING_CITY']}:\n{' | '.join(intervals)}"
+    return f"24hr weather forecast for {city}:\n{' | '.join(intervals)}"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+import asyncio
+import io
+import time
+
+import discord
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class StreamingReply:
+    """Posts a Discord message and progressively edits it as text streams in.
+
+    Edits are throttled to one per `edit_interval` seconds, which keeps us under
+    Discord's limit of 5 message edits per 5 seconds per channel.
+    """
+
+    def __init__(self, channel, edit_interval: float = 1.0):
+        self.channel = channel
+        self.edit_interval = edit_interval
+        self.text = ""
+
+        self._message = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def append(self, delta: str):
+        self.text += delta
+        if time.monotonic() - self._last_edit >= self.edit_interval:
+            await self._flush()
+
+    async def finish(self):
+        """Shows the complete text, spilling anything past Discord's limit into new messages."""
+        await self._flush()
+        for start in range(DISCORD_MESSAGE_LIMIT, len(self.text), DISCORD_MESSAGE_LIMIT):
+            await self.channel.send(self.text[start : start + DISCORD_MESSAGE_LIMIT])
+
+    async def cancel(self):
+        """Edits are awaited as they happen, so there is nothing left to stop."""
+
+    async def _flush(self):
+        preview = self.text[:DISCORD_MESSAGE_LIMIT]
+        if not preview.strip() or preview == self._shown:
+            return
+
+        if self._message is None:
+            self._message = await self.channel.send(preview)
+        else:
+            await self._message.edit(content=preview)
+        self._shown = preview
+        self._last_edit = time.monotonic()
+
+
+class SpeechReply:
+    """Speaks streamed text as a series of voice clips.
+
+    Each group of complete sentences is sent to TTS as soon as it has streamed
+    in, so the first clip can be playing while the rest is still being written.
+    Clips are synthesized concurrently but always posted in order.
+    """
+
+    SENTENCE_ENDINGS = (". ", "! ", "? ", "\n")
+
+    def __init__(self, channel, synthesize, min_chars: int = 120):
+        self.channel = channel
+        self.synthesize = synthesize
+        self.min_chars = min_chars
+        self.text = ""
+
+        self._pending = ""
+        self._clip_count = 0
+        self._last_clip = None
+        self._clips = []
+
+    async def append(self, delta: str):
+        self.text += delta
+        self._pending += delta
+        if len(self._pending) < self.min_chars:
+            return
+
+        cut = max(self._pending.rfind(ending) for ending in self.SENTENCE_ENDINGS)
+        if cut != -1:
+            self._queue_clip(self._pending[: cut + 1])
+            self._pending = self._pending[cut + 1 :]
+
+    async def finish(self):
+        self._queue_clip(self._pending)
+        self._pending = ""
+        if self._last_clip is not None:
+            await self._last_clip
+
+    async def cancel(self):
+        """Stops clips that haven't been posted yet, e.g. when the stream fails."""
+        for clip in self._clips:
+            clip.cancel()
+        await asyncio.gather(*self._clips, return_exceptions=True)
+
+    def _queue_clip(self, text: str):
+        text = text.strip()
+        if not text:
+            return
+        self._clip_count += 1
+        self._last_clip = asyncio.create_task(
+            self._speak(text, self._clip_count, self._last_clip)
+        )
+        self._clips.append(self._last_clip)
+
+    async def _speak(self, text: str, index: int, previous_clip):
+        audio = await self.synthesize(text)
+        if previous_clip is not None:
+            await previous_clip
+        await self.channel.send(
+            file=discord.File(io.BytesIO(audio), filename=f"response_{index}.mp3")
+        )
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import time
+
+
+class MessageDispatcher:
+    """Runs queued work in per-user order with a bounded number of users in flight.
+
+    Each user gets their own FIFO queue so their turns never interleave, while at
+    most `max_concurrent_users` turns (across all users) run at the same time.
+    Submissions past `max_queue_depth` pending items for a user are shed.
+    """
+
+    def __init__(self, handler, max_concurrent_users: int = 4, max_queue_depth: int = 5):
+        self.handler = handler
+        self.max_concurrent_users = max_concurrent_users
+        self.max_queue_depth = max_queue_depth
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_users)
+        self._queues: dict[int, asyncio.Queue] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+
+        self._processed = 0
+        self._shed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self, user_id: int, *args) -> bool:
+        """Queues handler(*args) for the user. Returns False if the item was shed."""
+        queue = self._queues.setdefault(user_id, asyncio.Queue())
+        if queue.qsize() >= self.max_queue_depth:
+            self._shed += 1
+            logging.warning(
+                f"Queue for user {user_id} is full ({queue.qsize()} pending), shedding message."
+            )
+            return False
+
+        queue.put_nowait((time.monotonic(), args))
+        if user_id not in self._workers:
+            self._workers[user_id] = asyncio.create_task(self._drain(user_id))
+        return True
+
+    async def _drain(self, user_id: int):
+        queue = self._queues[user_id]
+        try:
+            while not queue.empty():
+                enqueued_at, args = queue.get_nowait()
+                async with self._semaphore:
+                    wait = time.monotonic() - enqueued_at
+                    self._total_wait += wait
+                    self._max_wait = max(self._max_wait, wait)
+                    if wait > 1:
+                        logging.info(f"Message for user {user_id} waited {wait:.2f}s in queue.")
+                    try:
+                        await self.handler(*args)
+                    except Exception as e:
+                        logging.error(f"Error handling queued message for {user_id}: {e}")
+                    finally:
+                        self._processed += 1
+        finally:
+            # No await between the empty check and here, so nothing can slip in unnoticed
+            del self._workers[user_id]
+            if queue.empty():
+                del self._queues[user_id]
+
+    def stats(self) -> dict:
+        """Returns queue depth and wait time statistics."""
+        return {
+            "queue_depths": {uid: q.qsize() for uid, q in self._queues.items()},
+            "total_queued": sum(q.qsize() for q in self._queues.values()),
+            "active_users": len(self._workers),
+            "processed": self._processed,
+            "shed": self._shed,
+            "avg_wait_seconds": self._total_wait / self._processed if self._processed else 0.0,
+            "max_wait_seconds": self._max_wait,
+        }
@@ -0,0 +1,251 @@
+import base64
+import threading
+import time
+from collections import deque
+
+
+class AudioUplink:
+    """Sends microphone audio to the Realtime API in frames of `frame_ms` milliseconds.
+
+    Larger frames mean far fewer WebSocket messages per second of speech. Each
+    message is built from a fixed JSON template around the base64 audio instead
+    of building a dict and running json.dumps on every frame.
+    """
+
+    MESSAGE_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+    MESSAGE_SUFFIX = '"}'
+
+    def __init__(self, ws, rate: int, frame_ms: int = 100, sample_width: int = 2):
+        self.ws = ws
+        self.frame_ms = frame_ms
+        self.frames_per_message = max(1, rate * frame_ms // 1000)
+        self.bytes_per_message = self.frames_per_message * sample_width
+
+        self.messages = 0
+        self.bytes_sent = 0
+        self.audio_bytes = 0
+        self._started_at = time.monotonic()
+
+    async def send(self, audio: bytes):
+        message = (
+            self.MESSAGE_PREFIX
+            + base64.b64encode(audio).decode("ascii")
+            + self.MESSAGE_SUFFIX
+        )
+        await self.ws.send(message)
+        self.messages += 1
+        self.bytes_sent += len(message)
+        self.audio_bytes += len(audio)
+
+    def stats(self) -> dict:
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "frame_ms": self.frame_ms,
+            "messages": self.messages,
+            "bytes_sent": self.bytes_sent,
+            "messages_per_sec": round(self.messages / elapsed, 2),
+            "bytes_per_sec": round(self.bytes_sent / elapsed),
+            "audio_bytes_per_sec": round(self.audio_bytes / elapsed),
+        }
+
+
+class AudioPlayer:
+    """Plays audio on a dedicated thread, fed through a bounded ring buffer.
+
+    feed() only copies bytes into the buffer, so the event loop never waits on the
+    sound card. Playback (re)starts once `prebuffer_ms` of audio is queued, or the
+    first queued audio has waited that long, which absorbs bursty delivery.
+
+    Sets state["is_playing"] while audio is queued or playing and
+    state["last_output_at"] after each write, for the uplink's echo suppression.
+
+    Queued audio is tagged with the conversation item it belongs to, so on
+    interruption the player knows how much of that item was actually played.
+    """
+
+    def __init__(
+        self,
+        stream,
+        state: dict,
+        rate: int,
+        sample_width: int = 2,
+        chunk_frames: int = 1024,
+        buffer_seconds: float = 60,
+        prebuffer_ms: float = 100,
+    ):
+        self.stream = stream
+        self.state = state
+        self.sample_width = sample_width
+        self.bytes_per_ms = rate * sample_width / 1000
+        self.chunk_bytes = chunk_frames * sample_width
+        self.prebuffer_bytes = int(prebuffer_ms * self.bytes_per_ms)
+        self.prebuffer_seconds = prebuffer_ms / 1000
+
+        capacity = int(rate * buffer_seconds) * sample_width
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._read_pos = 0
+        self._size = 0
+        self._buffering = True
+        self._first_queued_at = None
+        self._closed = False
+        self._condition = threading.Condition()
+        # [item_id, content_index, queued bytes] in playback order
+        self._segments = deque()
+        self._playing_item = None
+        self._played_bytes = 0
+        # Bumped by interrupt(), so a write in flight isn't counted against new audio
+        self._generation = 0
+
+        self.dropped_bytes = 0
+        self.underruns = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="audio-playback", daemon=True
+        )
+        self._thread.start()
+
+    def feed(self, audio: bytes, item_id: str = None, content_index: int = 0):
+        """Queues audio for playback. Audio that doesn't fit in the buffer is dropped."""
+        audio = memoryview(audio)
+        with self._condition:
+            capacity = len(self._buffer)
+            space = capacity - self._size
+            if len(audio) > space:
+                space -= space % self.sample_width
+                self.dropped_bytes += len(audio) - space
+                audio = audio[:space]
+            if not audio:
+                return
+
+            write_pos = (self._read_pos + self._size) % capacity
+            first = min(len(audio), capacity - write_pos)
+            self._view[write_pos : write_pos + first] = audio[:first]
+            self._view[: len(audio) - first] = audio[first:]
+            self._size += len(audio)
+
+            if self._segments and self._segments[-1][:2] == [item_id, content_index]:
+                self._segments[-1][2] += len(audio)
+            else:
+                self._segments.append([item_id, content_index, len(audio)])
+
+            if self._first_queued_at is None:
+                self._first_queued_at = time.monotonic()
+            self.state["is_playing"] = True
+            self._condition.notify()
+
+    def interrupt(self) -> tuple[str, int, int] | None:
+        """Drops all queued audio right away.
+
+        Returns (item_id, content_index, audio_end_ms) for the item that was cut
+        off, where audio_end_ms is how much of it was actually played, or None if
+        nothing was cut off.
+        """
+        with self._condition:
+            if self._segments:
+                item_id, content_index, _ = self._segments[0]
+                played = (
+                    self._played_bytes
+                    if self._playing_item == (item_id, content_index)
+                    else 0
+                )
+            elif self._playing_item and self.state.get("is_response_active"):
+                # Everything queued was played, but the response is still streaming
+                item_id, content_index = self._playing_item
+                played = self._played_bytes
+            else:
+                return None
+
+            self._read_pos = 0
+            self._size = 0
+            self._segments.clear()
+            self._generation += 1
+            self._buffering = True
+            self._first_queued_at = None
+            self.state["is_playing"] = False
+
+        if item_id is None:
+            return None
+        return item_id, content_index, int(played / self.bytes_per_ms)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout=1)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "buffered_ms": round(self._size / self.bytes_per_ms),
+                "dropped_ms": round(self.dropped_bytes / self.bytes_per_ms),
+                "underruns": self.underruns,
+            }
+
+    def _ready(self) -> bool:
+        if not self._size:
+            return False
+        if not self._buffering or self._size >= self.prebuffer_bytes:
+            return True
+        return time.monotonic() - self._first_queued_at >= self.prebuffer_seconds
+
+    def _record_played(self, n: int):
+        """Attributes n played bytes to the queued items, oldest first."""
+        while n and self._segments:
+            segment = self._segments[0]
+            item = (segment[0], segment[1])
+            if item != self._playing_item:
+                self._playing_item = item
+                self._played_bytes = 0
+            played = min(n, segment[2])
+            self._played_bytes += played
+            segment[2] -= played
+            n -= played
+            if not segment[2]:
+                self._segments.popleft()
+
+    def _take(self, n: int) -> bytes:
+        capacity = len(self._buffer)
+        first = min(n, capacity - self._read_pos)
+        data = self._view[self._read_pos : self._read_pos + first].tobytes()
+        if first < n:
+            data += self._view[: n - first].tobytes()
+        self._read_pos = (self._read_pos + n) % capacity
+        self._size -= n
+        return data
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._ready():
+                    if self._closed:
+                        return
+                    timeout = None
+                    if self._size:
+                        # Still prebuffering; wake up when the wait runs out
+                        timeout = self.prebuffer_seconds - (
+                            time.monotonic() - self._first_queued_at
+                        )
+                    self._condition.wait(timeout=timeout)
+                chunk = self._take(min(self._size, self.chunk_bytes))
+                generation = self._generation
+                self._buffering = False
+
+            try:
+                self.stream.write(chunk)
+            except Exception as e:
+                print(f"\nError writing to audio stream: {e}")
+
+            with self._condition:
+                self.state["last_output_at"] = time.time()
+                if generation == self._generation:
+                    self._record_played(len(chunk))
+                if not self._size:
+                    if generation == self._generation and self.state.get(
+                        "is_response_active"
+                    ):
+                        # Ran dry mid-response; prebuffer again before resuming
+                        self.underruns += 1
+                    self._buffering = True
+                    self._first_queued_at = None
+                    self.state["is_playing"] = False
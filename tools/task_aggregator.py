@@ -23,14 +23,23 @@ class TaskAggregator:
 
         return summary
 
-    def email_report(self, to_email: str, summary: str):
-        """Emails the summary."""
-        print(f"Sending summary email to {to_email}...")
+    def email_report(self, to_email: str, summary: str) -> list[str]:
+        """Queues the summary email and returns one delivery id per recipient.
+
+        to_email may be a comma-separated list of recipients. The outbox sends
+        emails that are queued together in one Gmail batch.
+        """
+        print(f"Queueing summary email to {to_email}...")
         subject = "Daily Task Summary & Next Steps"
         # Since summary is now HTML, we provide it as html_content.
         # We can use a simple text version for the plain content.
         plain_text = "Please enable HTML to view this report."
-        self.gmail_client.send_email(
-            to_email, subject, plain_text, html_content=summary
-        )
-        print("Email sent successfully.")
+        recipients = [r.strip() for r in to_email.split(",") if r.strip()]
+        delivery_ids = [
+            self.gmail_client.queue_email(
+                recipient, subject, plain_text, html_content=summary
+            )
+            for recipient in recipients
+        ]
+        print("Email queued for delivery.")
+        return delivery_ids